@@ -1,6 +1,8 @@
 import streamlit as st
 from src.helper import models, features
-from src.model import load_model, model_coefficients
+from src.model import load_model, registry, model_explanation, artifact_hash
+from src.importance import compute_explanations, load_reference, synthetic_reference
+from utils.config import wait_for_model
 import pandas as pd
 import matplotlib.pyplot as plt
 
@@ -12,9 +14,49 @@ with st.sidebar:
         model_name = st.selectbox("Model", options=models.keys(), index=0)
     else:
         model_name = "model01"
+    compare = st.toggle("Compare All Models")
+    with st.expander("Model cache"):
+        st.json(registry.stats())
+
+wait_for_model(model_name)
+
+if compare:
+    # Bundles are built once per load; this only reads them from the registry
+    coefficients, effects = {}, {}
+    for name in models:
+        try:
+            explanation = model_explanation(name)
+        except Exception as e:
+            st.warning(f"{name}: could not load model ({e!r})")
+            continue
+        if explanation is None:
+            st.warning(f"{name}: model has no coefficients to compare")
+            continue
+        coefficients[name] = explanation.coefficients
+        effects[name] = explanation.effects
+    if not coefficients:
+        st.stop()
+
+    coefficients = pd.DataFrame(coefficients).round(2)
+    effects = pd.DataFrame(effects).round(2)
+    left_col, right_col = st.columns(2, gap="medium")
+    with left_col:
+        st.write("Coefficients")
+        st.dataframe(coefficients)
+        st.bar_chart(coefficients, horizontal=True, stack=False)
+    with right_col:
+        st.write("Standardized Effect Sizes")
+        st.dataframe(effects)
+        st.bar_chart(effects, horizontal=True, stack=False)
+    st.write("---")
+    st.stop()
 
 model = load_model(model_name)
-importances = model_coefficients(model).round(2)
+explanation = model_explanation(model_name)
+if explanation is None:
+    st.warning(f"{model_name} has no coefficients to explain.")
+    st.stop()
+importances = explanation.coefficients.round(2)
 
 left_col, middle_col, right_col = st.columns(
     [1, 1, 2], gap="medium", vertical_alignment="bottom"
@@ -26,4 +68,30 @@ with left_col:
         importances,
         horizontal=True,
     )
+with middle_col:
+    st.write(f"Intercept: {explanation.intercept:.2f}")
+    st.dataframe(explanation.effects.round(2))
+    st.bar_chart(
+        explanation.effects.round(2),
+        horizontal=True,
+    )
 st.write("---")
+
+if st.toggle("Permutation Importance & Partial Dependence"):
+    try:
+        X = load_reference()
+    except KeyError as e:
+        st.info(
+            f"{e.args[0]}. Using inputs sampled uniformly over the feature ranges."
+        )
+        X = synthetic_reference()
+    with st.spinner("Computing (cached after the first run)..."):
+        results = compute_explanations(model_name, X, artifact_hash(model_name))
+    imp_col, pdp_col = st.columns([1, 2], gap="medium")
+    with imp_col:
+        st.write("Mean absolute prediction shift when shuffled")
+        st.dataframe(results["importance"].round(2))
+        st.bar_chart(results["importance"]["importance"], horizontal=True)
+    with pdp_col:
+        feature = st.selectbox("Partial dependence of", list(features))
+        st.line_chart(results["partial_dependence"][feature])
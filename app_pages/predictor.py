@@ -1,57 +1,226 @@
+import os
+import time
+
+import pandas as pd
+import plotly.graph_objects as go
 import streamlit as st
 
 
-from src.model import load_model
-from src.helper import features, DataToPredict, models
+from src.model import (
+    audit_log,
+    load_model,
+    predict,
+    prediction_cache,
+    registry,
+    server,
+    submit_inputs,
+)
+from src.helper import batch_static_max_size, features, DataToPredict, models
+from src.batch import (
+    download_url,
+    feature_matrix,
+    output_formats,
+    output_path,
+    score_to_file,
+)
+from src.ingest import read_upload
+from src.sweep import sweep_1d, sweep_2d
+from utils.config import wait_for_model
 
 
 st.subheader("Make Prediction")
 
+
+@st.fragment
+def audit_panel(model_name):
+    """Recent audit records, read from SQLite only on request."""
+    st.json(audit_log.stats())
+    if st.toggle("Show recent predictions"):
+        st.dataframe(audit_log.recent(20, model_name=model_name))
+
+
 with st.sidebar:
     if st.toggle("Choose Different Model"):
         model_name = st.selectbox("Model", options=models.keys(), index=0)
     else:
         model_name = "model01"
+    mode = st.radio("Mode", ["Single row", "Batch scoring"], horizontal=True)
+    with st.expander("Model cache"):
+        st.json(registry.stats())
+    with st.expander("Prediction cache"):
+        st.json(prediction_cache.stats())
+    if audit_log is not None:
+        with st.expander("Audit log"):
+            audit_panel(model_name)
+    if server is not None:
+        with st.expander("Model server"):
+            try:
+                st.json(server.stats())
+            except ConnectionError as e:
+                st.warning(e)
 
-# set general Layout
-left_col, middle_col, right_col = st.columns(
-    [1.5, 1, 1], gap="large", vertical_alignment="top"
-)
+wait_for_model(model_name)
+
+if mode == "Batch scoring":
+    uploaded_file = st.file_uploader(
+        "Choose a CSV or Excel file to score", type=["csv", "xlsx"]
+    )
+    if uploaded_file is None:
+        st.info("Please upload a CSV or Excel file to get started.")
+        st.stop()
+    try:
+        df = read_upload(uploaded_file)
+    except Exception as e:
+        st.error(f"Error reading file: {e}")
+        st.stop()
 
-# Disply Inputs
-left_col.subheader("INPUTS")
-inputs = dict.fromkeys(DataToPredict.__fields__.keys())
-for key, params in features.items():
-    if isinstance(params[0], (int, float)):
-        inputs[key] = left_col.slider(
-            label=key,
-            min_value=params[0],
-            max_value=params[1],
-            value=params[2],
-            help="Feature Discription",
+    # Map uploaded columns to model features, defaulting to same-named columns
+    columns = df.columns.tolist()
+    with st.form("batch_form"):
+        st.markdown("### Column Mapping")
+        map_cols = st.columns(len(features))
+        mapping = {}
+        for col, key in zip(map_cols, features):
+            mapping[key] = col.selectbox(
+                key, columns, index=columns.index(key) if key in columns else 0
+            )
+        fmt = st.selectbox("Output format", output_formats)
+        submitted = st.form_submit_button("Score")
+    if not submitted:
+        st.stop()
+
+    X, invalid, report = feature_matrix(df, mapping)
+    n_invalid = int(invalid.sum())
+    if n_invalid:
+        st.warning(
+            f"{n_invalid} of {len(df)} rows have missing, non-numeric or "
+            "out-of-range values and are left unscored."
         )
+        st.dataframe(pd.DataFrame(report).T)
+
+    progress_bar = st.progress(0.0, text="Scoring...")
+    file_name = f"{os.path.splitext(uploaded_file.name)[0]}_scored.{fmt}"
+    try:
+        path = score_to_file(
+            df,
+            lambda chunk: predict(chunk, model_name),
+            X,
+            invalid,
+            fmt=fmt,
+            progress=progress_bar.progress,
+            path=output_path(file_name),
+        )
+    except ValueError as e:
+        st.error(e)
+        st.stop()
+    progress_bar.progress(1.0, text=f"Scored {len(df) - n_invalid} rows.")
+    # Served from disk, so the file is never read into the server's memory
+    if os.path.getsize(path) <= batch_static_max_size:
+        st.link_button("Download predictions", download_url(path))
     else:
-        inputs[key] = middle_col.selectbox(
-            label=key,
-            options=params,
-            help="Feature Discription",
+        # Too large for static serving: read only when the button is clicked
+        st.download_button(
+            "Download predictions",
+            data=lambda: open(path, "rb"),
+            file_name=file_name,
         )
+    st.stop()
 
 
-# Display Prediction
-with right_col:
-    st.subheader(f"PREDICTION")
-    model = load_model(model_name)
-    X = list(DataToPredict(**inputs).dict().values())
+@st.fragment
+def prediction_panel(model_name):
+    """Inputs and prediction; slider moves rerun only this fragment."""
+    start = time.perf_counter()
+
+    # set general Layout
+    left_col, middle_col, right_col = st.columns(
+        [1.5, 1, 1], gap="large", vertical_alignment="top"
+    )
+
+    # Disply Inputs
+    left_col.subheader("INPUTS")
+    inputs = dict.fromkeys(DataToPredict.__fields__.keys())
+    for key, params in features.items():
+        if isinstance(params[0], (int, float)):
+            inputs[key] = left_col.slider(
+                label=key,
+                min_value=params[0],
+                max_value=params[1],
+                value=params[2],
+                help="Feature Discription",
+            )
+        else:
+            inputs[key] = middle_col.selectbox(
+                label=key,
+                options=params,
+                help="Feature Discription",
+            )
+
+    # Display Prediction
+    with right_col:
+        st.subheader(f"PREDICTION")
+        future = submit_inputs(inputs, model_name)
+        # Render what doesn't depend on the prediction while it is scored
+        metric_slot = st.empty()
+        model = load_model(model_name)
+        with st.expander("See explanation"):
+            st.write(list(model.coef_), model.intercept_)
+            st.write(model.n_features_in_)
+
+        try:
+            # X = data[:model.n_features_in_]
+            result = future.result()
+            metric_slot.metric("# Prediction", value=result.round(2))
+        except ValueError as e:
+            # st.exception(e)
+            metric_slot.metric("# Prediction", value="ERROR")
+        st.caption(f"Updated in {1000 * (time.perf_counter() - start):.1f} ms")
+
+    # Hand the current inputs to the sweep fragment without rerunning it
+    st.session_state["sweep_inputs"] = inputs
+
+
+@st.fragment
+def sweep_panel(model_name):
+    """What-if sweeps, recomputed only when asked for."""
+    with st.expander("What-if Sweep"):
+        curve_tab, heatmap_tab = st.tabs(["1 Feature", "2 Features"])
+        with curve_tab:
+            feature = st.selectbox("Feature to sweep", list(features))
+        with heatmap_tab:
+            col_x, col_y = st.columns(2)
+            feature_x = col_x.selectbox("X axis", list(features), index=0)
+            feature_y = col_y.selectbox("Y axis", list(features), index=1)
+        if st.button("Run sweep", help="Sweep around the current inputs"):
+            st.session_state["sweep_run"] = dict(st.session_state["sweep_inputs"])
+        inputs = st.session_state.get("sweep_run")
+        if inputs is None:
+            return
+        with curve_tab:
+            try:
+                st.line_chart(sweep_1d(inputs, feature, model_name))
+            except ValueError as e:
+                st.error(e)
+        with heatmap_tab:
+            if feature_x == feature_y:
+                st.warning("Choose two different features.")
+            else:
+                try:
+                    surface = sweep_2d(inputs, feature_x, feature_y, model_name)
+                except ValueError as e:
+                    st.error(e)
+                else:
+                    fig = go.Figure(
+                        go.Heatmap(
+                            z=surface.to_numpy(),
+                            x=surface.columns,
+                            y=surface.index,
+                            colorbar=dict(title="Prediction"),
+                        )
+                    )
+                    fig.update_layout(xaxis_title=feature_x, yaxis_title=feature_y)
+                    st.plotly_chart(fig, use_container_width=True)
 
-    try:
-        # X = data[:model.n_features_in_]
-        result = model.predict([X])
-        st.metric("# Prediction", value=result.round(2))
-    except ValueError as e:
-        # st.exception(e)
-        st.metric("# Prediction", value="ERROR")
 
-    with st.expander("See explanation"):
-        st.write(list(model.coef_), model.intercept_)
-        st.write(model.n_features_in_)
+prediction_panel(model_name)
+sweep_panel(model_name)
@@ -1,7 +1,21 @@
+import os
 import streamlit as st
 import pandas as pd
 import numpy as np
 import src.pyspc.continous as pyspc
+from src.helper import resolve_data_path, server_data_root
+from src.ingest import (
+    combined_columns,
+    directory_files,
+    excel_sheets,
+    open_combined,
+    open_upload,
+    upload_files,
+)
+from src.pyspc.core import add_capability, cached_spc
+from src.pyspc.dashboard import summarize_upload
+from src.pyspc.rules import NELSON_RULES, cached_violations, rule_counts
+from src.pyspc.streaming import follow_csv
 import matplotlib.pyplot as plt
 
 st.title("Statistical Process Control")
@@ -9,31 +23,156 @@ st.title("Statistical Process Control")
 
 st.title("SPC Chart Generator")
 
-# File uploader
-uploaded_file = st.file_uploader("Choose a CSV or Excel file", type=["csv", "xlsx"])
+source = st.radio(
+    "Data source",
+    ["Upload", "Local directory", "Large local CSV (streaming)"],
+    horizontal=True,
+)
 
-if uploaded_file is not None:
-    # Read the uploaded file
+if source == "Large local CSV (streaming)":
+    # Out-of-core path: limits and capability only, the file is never fully loaded
+    csv_path = st.text_input(
+        "Path to CSV file on the server",
+        help=f"Relative to the data directory {server_data_root}.",
+    )
+    if not csv_path:
+        st.info("Enter the path of a CSV file to get started.")
+        st.stop()
+    try:
+        csv_path = resolve_data_path(csv_path)
+        columns = pd.read_csv(csv_path, nrows=0).columns.tolist()
+    except Exception as e:
+        st.error(f"Error reading file: {e}")
+        st.stop()
+
+    with st.form("streaming_form"):
+        selected_column = st.selectbox("Select column for analysis", columns)
+        num_samples = st.slider(
+            "Number of measurements per sample (subgroup size)",
+            min_value=1,
+            max_value=25,
+            value=5,
+        )
+        submitted = st.form_submit_button("Compute")
+    # Later reruns (e.g. editing the specification limits) keep following
+    # the submitted file and column
+    if submitted:
+        st.session_state["streaming_source"] = (csv_path, selected_column, num_samples)
+    if st.session_state.get("streaming_source") != (
+        csv_path,
+        selected_column,
+        num_samples,
+    ):
+        st.stop()
+
+    # The file is followed: computing again only reads the rows appended since
+    status = st.empty()
+    try:
+        follower = follow_csv(csv_path, selected_column, num_samples)
+        new_rows = follower.poll(
+            progress=lambda rows: status.write(f"Read {rows:,} rows..."),
+        )
+        stats = follower.spc
+        limits = stats.limits()
+    except (KeyError, ValueError) as e:
+        st.error(e)
+        st.stop()
+    status.write(
+        f"Read {new_rows:,} new rows. {stats.count:,} values "
+        f"({stats.subgroups:,} subgroups) in total, "
+        f"range {stats.minimum:.4f} to {stats.maximum:.4f}."
+    )
+    spec_cols = st.columns(2)
+    LSL = spec_cols[0].number_input(
+        "Lower Specification Limit",
+        value=float(stats.minimum),
+        key=f"streaming_LSL_{csv_path}_{selected_column}",
+    )
+    USL = spec_cols[1].number_input(
+        "Upper Specification Limit",
+        value=float(stats.maximum),
+        key=f"streaming_USL_{csv_path}_{selected_column}",
+    )
+
+    st.subheader(f'{limits["chart"]} Control Limits')
+    st.table(pd.Series(limits).drop("chart").rename("Value"))
+
+    Cp, Cpk, Cpu, Cpl = stats.capability(LSL, USL)
+    st.subheader('Process Capability Indices')
+    st.write(f'Cp: {Cp:.4f}')
+    st.write(f'Cpk: {Cpk:.4f}')
+    st.write(f'Cpu: {Cpu:.4f}')
+    st.write(f'Cpl: {Cpl:.4f}')
+    st.stop()
+
+# File uploader; several files (e.g. one per shift) are combined into one series
+directory = None
+uploaded_files = []
+if source == "Local directory":
+    directory = st.text_input(
+        "Directory on the server",
+        help=f"Relative to the data directory {server_data_root}.",
+    )
+    pattern = st.text_input("File name pattern", value="*.csv")
+else:
+    uploaded_files = st.file_uploader(
+        "Choose CSV or Excel files", type=["csv", "xlsx"], accept_multiple_files=True
+    )
+
+if uploaded_files or directory:
+    # Read the uploaded file(s)
     try:
-        file_type = uploaded_file.name.split(".")[-1]
-        if file_type == "csv":
-            df = pd.read_csv(uploaded_file)
-        elif file_type == "xlsx":
-            df = pd.read_excel(uploaded_file)
+        float32 = st.checkbox(
+            "Load values as float32",
+            help="Halves the memory of float columns; columns where float32 "
+            "rounding is not negligible against their spread stay float64.",
+        )
+        if len(uploaded_files) == 1:
+            uploaded_file = uploaded_files[0]
+            sheet_name = 0
+            if uploaded_file.name.lower().endswith((".xls", ".xlsx")):
+                sheets = excel_sheets(uploaded_file.getvalue())
+                if len(sheets) > 1:
+                    sheet_name = st.selectbox("Sheet", sheets)
+            upload = open_upload(uploaded_file, sheet_name, float32=float32)
         else:
-            st.error("Unsupported file type.")
-            st.stop()
+            if directory:
+                # The pattern is checked too, so it cannot lead out either
+                folder, name = os.path.split(
+                    resolve_data_path(os.path.join(directory, pattern))
+                )
+                files = directory_files(folder, name)
+            else:
+                files = upload_files(uploaded_files)
+            # Files are parsed in parallel; the column list comes from their
+            # Parquet schemas, so they are combined once, in the chosen order
+            order_by = st.selectbox(
+                "Order rows by",
+                ["File name"] + combined_columns(files),
+                help="Pick a timestamp column to interleave rows across files.",
+            )
+            upload = open_combined(
+                files, None if order_by == "File name" else order_by, float32=float32
+            )
+            st.caption(f"{upload.num_rows:,} rows combined")
     except Exception as e:
         st.error(f"Error reading file: {e}")
         st.stop()
 
     with st.popover("Data Preview"):
-        st.dataframe(df.head())
+        st.dataframe(upload.head())
+        if st.checkbox("Show memory footprint per column"):
+            st.dataframe(upload.memory_report(), use_container_width=True)
+
+    view = st.radio(
+        "View", ["Single column", "All columns dashboard"], horizontal=True
+    )
 
     # Select column for analysis
-    columns = df.columns.tolist()
+    columns = upload.numeric_columns
     with st.sidebar:
-        selected_column = st.selectbox("Select column for analysis", columns)
+        if view == "Single column":
+            selected_column = st.selectbox("Select column for analysis", columns)
 
         # Get slider inputs
         num_samples = st.slider(
@@ -42,83 +181,96 @@ if uploaded_file is not None:
             max_value=25,
             value=5,
         )
-        LSL = st.number_input(
-            "Lower Specification Limit", value=float(df[selected_column].min())
-        )
-        USL = st.number_input(
-            "Upper Specification Limit", value=float(df[selected_column].max())
-        )
+        if view == "Single column":
+            column_min, column_max = upload.column_range(selected_column)
+            LSL = st.number_input(
+                "Lower Specification Limit", value=float(column_min)
+            )
+            USL = st.number_input(
+                "Upper Specification Limit", value=float(column_max)
+            )
 
         # Choose chart type
         chart_type = st.selectbox(
             "Select type of control chart", ["X-bar and R chart", "X-bar and S chart"]
         )
+        flag_rules = st.checkbox("Highlight Nelson rule violations", value=True)
+
+    if view == "All columns dashboard":
+        # Every numeric column in one batched pass, worst capability first;
+        # selecting a row drills down into that column's charts below
+        spec = pd.DataFrame(
+            [upload.column_range(name) for name in columns],
+            index=columns,
+            columns=["LSL", "USL"],
+            dtype=float,
+        )
+        with st.expander("Specification limits"):
+            spec = st.data_editor(spec, use_container_width=True)
+        summary = summarize_upload(upload, columns, num_samples)
+        summary = add_capability(summary, spec["LSL"], spec["USL"])
+        summary = summary.sort_values("Cpk")
+        event = st.dataframe(
+            summary,
+            use_container_width=True,
+            on_select="rerun",
+            selection_mode="single-row",
+        )
+        if not event.selection.rows:
+            st.info("Select a row to see the control charts of that column.")
+            st.stop()
+        selected_column = summary.index[event.selection.rows[0]]
+        LSL, USL = spec.loc[selected_column, ["LSL", "USL"]]
+        st.subheader(selected_column)
 
-    # Prepare data for control charts
-    data = df[selected_column]
+    # Statistics are computed once per (data, column, subgroup size) and shared
+    # with the interactive page; the figures below only draw them
+    try:
+        result = cached_spc(
+            upload.cache_key,
+            selected_column,
+            num_samples,
+            lambda: upload.column(selected_column),
+        )
+    except ValueError as e:
+        st.error(e)
+        st.stop()
 
     # Decide which chart to plot based on num_samples
     if num_samples == 1:
         st.write('Using X-MR (Individuals and Moving Range) Chart since subgroup size is 1.')
-        try:
-            # Calculate control limits and statistics using pyspc functions
-            X, X_bar, MR, MR_bar, UCL_X, LCL_X, UCL_MR, LCL_MR = pyspc.calculate_x_mr_chart(data)
-
-            # Plot X chart
-            st.subheader('X (Individuals) Chart')
-            fig1 = pyspc.plot_x_chart(X, UCL_X, LCL_X, X_bar)
-            st.pyplot(fig1)
-
-            # Plot MR chart
-            st.subheader('Moving Range Chart')
-            fig2 = pyspc.plot_mr_chart(MR, UCL_MR, LCL_MR, MR_bar)
-            st.pyplot(fig2)
-        except ValueError as e:
-            st.error(e)
-            st.stop()
-
+        titles = ('X (Individuals) Chart', 'Moving Range Chart')
     elif 2 <= num_samples <= 9:
         st.write('Using X-bar and R Chart since subgroup size is between 2 and 9.')
-        try:
-            # Calculate control limits and statistics using pyspc functions
-            X_bar, X_double_bar, R, R_bar, UCL_X, LCL_X, UCL_R, LCL_R = pyspc.calculate_xbar_r_chart(data, num_samples)
-
-            # Plot X-bar chart
-            st.subheader('X-bar Chart')
-            fig1 = pyspc.plot_xbar_chart(X_bar, UCL_X, LCL_X, X_double_bar)
-            st.pyplot(fig1)
-
-            # Plot R chart
-            st.subheader('R Chart')
-            fig2 = pyspc.plot_r_chart(R, UCL_R, LCL_R, R_bar)
-            st.pyplot(fig2)
-        except ValueError as e:
-            st.error(e)
-            st.stop()
-    elif num_samples >= 10:
+        titles = ('X-bar Chart', 'R Chart')
+    else:
         st.write('Using X-bar and S Chart since subgroup size is 10 or more.')
-        try:
-            # Calculate control limits and statistics using pyspc functions
-            X_bar, X_double_bar, S, S_bar, UCL_X, LCL_X, UCL_S, LCL_S = pyspc.calculate_xbar_s_chart(data, num_samples)
-
-            # Plot X-bar chart
-            st.subheader('X-bar Chart')
-            fig1 = pyspc.plot_xbar_chart(X_bar, UCL_X, LCL_X, X_double_bar)
-            st.pyplot(fig1)
-
-            # Plot S chart
-            st.subheader('S Chart')
-            fig2 = pyspc.plot_s_chart(S, UCL_S, LCL_S, S_bar)
-            st.pyplot(fig2)
-        except ValueError as e:
-            st.error(e)
-            st.stop()
+        titles = ('X-bar Chart', 'S Chart')
 
-    else:
-        st.error('Invalid subgroup size.')
+    violations = None
+    if flag_rules:
+        violations = cached_violations(
+            upload.cache_key, selected_column, num_samples, result
+        )
+    fig1, fig2 = pyspc.plot_spc(result, violations)
+    st.subheader(titles[0])
+    st.pyplot(fig1)
+    st.subheader(titles[1])
+    st.pyplot(fig2)
+    if violations is not None:
+        with st.expander("Nelson rule violations (points flagged per rule)"):
+            st.table(
+                pd.DataFrame(
+                    {
+                        "Rule": NELSON_RULES,
+                        titles[0]: rule_counts(violations[0]),
+                        titles[1]: rule_counts(violations[1]),
+                    }
+                )
+            )
 
     # Calculate process capability indices
-    Cp, Cpk, Cpu, Cpl = pyspc.calculate_process_capability(data, LSL, USL)
+    Cp, Cpk, Cpu, Cpl = result.capability(LSL, USL)
     st.subheader('Process Capability Indices')
     st.write(f'Cp: {Cp:.4f}')
     st.write(f'Cpk: {Cpk:.4f}')
@@ -126,4 +278,4 @@ if uploaded_file is not None:
     st.write(f'Cpl: {Cpl:.4f}')
 
 else:
-    st.info('Please upload a CSV or Excel file to get started.')
\ No newline at end of file
+    st.info('Please upload CSV or Excel files to get started.')
\ No newline at end of file
@@ -2,6 +2,9 @@ import streamlit as st
 import pandas as pd
 import numpy as np
 import src.pyspc.continous_interactive as spc  # Import the spc_plotly module
+from src.ingest import excel_sheets, open_upload
+from src.pyspc.core import cached_spc
+from src.pyspc.rules import NELSON_RULES, cached_violations, rule_counts
 
 
 # main_streamlit_app.py
@@ -13,21 +16,26 @@ uploaded_file = col_left.file_uploader("Choose a CSV or Excel file", type=['csv'
 if uploaded_file is not None:
     # Read the uploaded file
     try:
-        file_type = uploaded_file.name.split('.')[-1].lower()
-        if file_type == 'csv':
-            df = pd.read_csv(uploaded_file)
-        elif file_type in ['xls', 'xlsx']:
-            df = pd.read_excel(uploaded_file)
-        else:
-            st.error('Unsupported file type.')
-            st.stop()
+        sheet_name = 0
+        if uploaded_file.name.lower().endswith((".xls", ".xlsx")):
+            sheets = excel_sheets(uploaded_file.getvalue())
+            if len(sheets) > 1:
+                sheet_name = st.selectbox("Sheet", sheets)
+        float32 = col_left.checkbox(
+            "Load values as float32",
+            help="Halves the memory of float columns; columns where float32 "
+            "rounding is not negligible against their spread stay float64.",
+        )
+        upload = open_upload(uploaded_file, sheet_name, float32=float32)
     except Exception as e:
         st.error(f"Error reading file: {e}")
         st.stop()
     col_right.success("File successfully uploaded!")
     with col_right.popover("Data Preview"):
-        st.dataframe(df.head())
-    columns = df.columns.tolist()
+        st.dataframe(upload.head())
+        if st.checkbox("Show memory footprint per column"):
+            st.dataframe(upload.memory_report(), use_container_width=True)
+    columns = upload.numeric_columns
 
     # Create a form for user inputs
     with st.sidebar.form("spc_form"):
@@ -40,8 +48,9 @@ if uploaded_file is not None:
             min_value=1, max_value=25, value=5, step=1
         )
         # Display default values based on data
-        default_LSL = float(df[selected_column].min())
-        default_USL = float(df[selected_column].max())
+        column_min, column_max = upload.column_range(selected_column)
+        default_LSL = float(column_min)
+        default_USL = float(column_max)
         LSL = st.number_input(
             'Lower Specification Limit (LSL)',
             value=default_LSL,
@@ -52,6 +61,7 @@ if uploaded_file is not None:
             value=default_USL,
             step=0.1,
         )
+        flag_rules = st.checkbox("Highlight Nelson rule violations", value=True)
         # Optional: Add validation to ensure LSL < USL
         if LSL >= USL:
             st.error("Error: LSL must be less than USL.")
@@ -62,62 +72,48 @@ if uploaded_file is not None:
     if submitted:
         st.markdown("---")
         st.write("### SPC Analysis Results")
-        # Prepare data for control charts
-        data = df[selected_column].dropna()  # Remove NaN values if any
+        # Statistics are computed once per (data, column, subgroup size) and
+        # shared with the Matplotlib page; missing values are dropped
+        try:
+            result = cached_spc(
+                upload.cache_key,
+                selected_column,
+                num_samples,
+                lambda: upload.column(selected_column),
+            )
+        except ValueError as e:
+            st.error(e)
+            st.stop()
         # Decide which chart to plot based on num_samples
         if num_samples == 1:
             st.info('Using X-MR (Individuals and Moving Range) Chart since subgroup size is 1.')
-            try:
-                # Calculate control limits and statistics using spc_plotly functions
-                X, X_bar, MR, MR_bar, UCL_X, LCL_X, UCL_MR, LCL_MR = spc.calculate_x_mr_chart(data)
-                # Plot X chart with LSL and USL
-                st.subheader('X (Individuals) Chart')
-                fig1 = spc.plot_x_chart(X, UCL_X, LCL_X, X_bar, LSL=LSL, USL=USL)
-                st.plotly_chart(fig1, use_container_width=True)
-                # Plot MR chart (Specification limits may not be relevant here, but we'll include them for completeness)
-                # st.subheader('Moving Range Chart')
-                fig2 = spc.plot_mr_chart(MR, UCL_MR, LCL_MR, MR_bar, LSL=LSL, USL=USL)
-                st.plotly_chart(fig2, use_container_width=True)
-            except ValueError as e:
-                st.error(e)
-                st.stop()
+            st.subheader('X (Individuals) Chart')
         elif 2 <= num_samples <= 9:
             st.info('Using X-bar and R Chart since subgroup size is between 2 and 9.')
-            try:
-                # Calculate control limits and statistics using spc_plotly functions
-                X_bar, X_double_bar, R, R_bar, UCL_X, LCL_X, UCL_R, LCL_R = spc.calculate_xbar_r_chart(data, num_samples)
-                # Plot X-bar chart with LSL and USL
-                # st.subheader('X-bar Chart')
-                fig1 = spc.plot_xbar_chart(X_bar, UCL_X, LCL_X, X_double_bar, LSL=LSL, USL=USL)
-                st.plotly_chart(fig1, use_container_width=True)
-                # Plot R chart
-                # st.subheader('R Chart')
-                fig2 = spc.plot_r_chart(R, UCL_R, LCL_R, R_bar)
-                st.plotly_chart(fig2, use_container_width=True)
-            except ValueError as e:
-                st.error(e)
-                st.stop()
-        elif num_samples >= 10:
-            st.info('Using X-bar and S Chart since subgroup size is 10 or more.')
-            try:
-                # Calculate control limits and statistics using spc_plotly functions
-                X_bar, X_double_bar, S, S_bar, UCL_X, LCL_X, UCL_S, LCL_S = spc.calculate_xbar_s_chart(data, num_samples)
-                # Plot X-bar chart with LSL and USL
-                # st.subheader('X-bar Chart')
-                fig1 = spc.plot_xbar_chart(X_bar, UCL_X, LCL_X, X_double_bar, LSL=LSL, USL=USL)
-                st.plotly_chart(fig1, use_container_width=True)
-                # Plot S chart
-                # st.subheader('S Chart')
-                fig2 = spc.plot_s_chart(S, UCL_S, LCL_S, S_bar)
-                st.plotly_chart(fig2, use_container_width=True)
-            except ValueError as e:
-                st.error(e)
-                st.stop()
         else:
-            st.error('Invalid subgroup size.')
+            st.info('Using X-bar and S Chart since subgroup size is 10 or more.')
+        violations = None
+        if flag_rules:
+            violations = cached_violations(
+                upload.cache_key, selected_column, num_samples, result
+            )
+        fig1, fig2 = spc.plot_spc(result, LSL=LSL, USL=USL, violations=violations)
+        st.plotly_chart(fig1, use_container_width=True)
+        st.plotly_chart(fig2, use_container_width=True)
+        if violations is not None:
+            with st.expander("Nelson rule violations (points flagged per rule)"):
+                st.table(
+                    pd.DataFrame(
+                        {
+                            "Rule": NELSON_RULES,
+                            "Location chart": rule_counts(violations[0]),
+                            "Spread chart": rule_counts(violations[1]),
+                        }
+                    )
+                )
        # Calculate process capability indices
         try:
-            Cp, Cpk, Cpu, Cpl = spc.calculate_process_capability(data, LSL, USL)
+            Cp, Cpk, Cpu, Cpl = result.capability(LSL, USL)
             st.subheader('Process Capability Indices')
 
             # Determine process capability judgment
@@ -0,0 +1,71 @@
+"""
+Compare the installed pandas Excel engines on the bundled dataset and on
+synthetic workbooks.
+
+Usage:
+    python -m benchmarks.excel_engines
+    python -m benchmarks.excel_engines --rows 10000 1000000 --columns 5
+
+Synthetic workbooks are written once to the temp directory and reused.
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from src.helper import dataset_path
+from src.ingest import available_excel_engines, read_excel
+
+
+def synthetic_workbook(n_rows, n_columns):
+    path = os.path.join(tempfile.gettempdir(), f"spc_bench_{n_rows}x{n_columns}.xlsx")
+    if not os.path.exists(path):
+        rng = np.random.default_rng(0)
+        df = pd.DataFrame(
+            rng.normal(10, 2, (n_rows, n_columns)),
+            columns=[f"sensor_{j}" for j in range(n_columns)],
+        )
+        df.to_excel(path + ".tmp.xlsx", index=False)
+        os.replace(path + ".tmp.xlsx", path)
+    return path
+
+
+def time_engine(path, engine, repeats):
+    best = np.inf
+    for _ in range(repeats):
+        start = time.perf_counter()
+        df = read_excel(path, engine=engine)
+        best = min(best, time.perf_counter() - start)
+    return best, df.shape
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", nargs="*", type=int, default=[10_000, 1_000_000])
+    parser.add_argument("--columns", type=int, default=5)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    engines = available_excel_engines()
+    print(f"Installed engines (fastest first): {', '.join(engines)}")
+    workbooks = [dataset_path]
+    for n_rows in args.rows:
+        print(f"Preparing {n_rows:,}-row workbook...")
+        workbooks.append(synthetic_workbook(n_rows, args.columns))
+
+    for path in workbooks:
+        repeats = args.repeats if os.path.getsize(path) < 50e6 else 1
+        for engine in engines:
+            seconds, shape = time_engine(path, engine, repeats)
+            print(
+                f"{os.path.basename(path):<32} {engine:<10} {shape[0]:>9,} rows"
+                f" {seconds:8.3f} s"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+"""
+Compare the compiled linear fast path against sklearn's `predict`.
+
+Run with `python -m benchmarks.linear_fast_path`.
+"""
+
+import timeit
+
+import numpy as np
+
+from src.helper import models
+from src.model import as_model_input, registry
+
+
+def _best_of(fn, number, repeat=5):
+    return min(timeit.repeat(fn, number=number, repeat=repeat)) / number
+
+
+if __name__ == "__main__":
+    rng = np.random.default_rng(0)
+    for model_name in models:
+        try:
+            entry = registry.get_entry(model_name)
+        except Exception as e:
+            print(f"{model_name}: could not load: {e!r}")
+            continue
+        fast = entry.extras.get("fast")
+        if fast is None:
+            print(f"{model_name}: not a plain linear model, no fast path")
+            continue
+        model = entry.model
+        for rows, number in [(1, 2000), (1_000_000, 3)]:
+            X = rng.uniform(0, 100, (rows, model.n_features_in_))
+            X_model = as_model_input(model, X)
+            sk = _best_of(lambda: model.predict(X_model), number)
+            fp = _best_of(lambda: fast.predict(X), number)
+            err = np.max(np.abs(fast.predict(X) - model.predict(X_model)))
+            print(
+                f"{model_name} rows={rows:>9,}: sklearn {sk * 1e6:10.1f} us"
+                f" | fast {fp * 1e6:10.1f} us | x{sk / fp:6.1f} | max err {err:.2e}"
+            )
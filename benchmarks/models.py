@@ -0,0 +1,167 @@
+"""
+Latency and throughput benchmark for every model in `src.helper.models`.
+
+Measures per model:
+    - cold load time (deserializing the artifact, bypassing the registry),
+    - warm single-row latency p50/p95/p99 through `predict_local`,
+    - batch throughput in rows/s at 1, 100, 10k and 1M rows.
+
+Every metric is the median over `--repeats` runs of the whole benchmark.
+
+Usage:
+    python -m benchmarks.models --output results.json
+    python -m benchmarks.models --baseline results.json --tolerance 0.25
+
+With `--baseline`, any metric worse than the baseline by more than
+`--tolerance` (relative) and by more than its `ABSOLUTE_FLOOR` is reported
+and the exit code is 1.
+"""
+
+import argparse
+import json
+import platform
+import sys
+import time
+
+import numpy as np
+
+from src.helper import features, models
+from src.model import _load_artifact, predict_local, registry
+
+BATCH_SIZES = [1, 100, 10_000, 1_000_000]
+
+# Metrics where a bigger number is better; everything else is a duration
+HIGHER_IS_BETTER = ("rows_per_s",)
+
+# By metric suffix: a change must also exceed this absolute amount to count as
+# a regression, so metrics of a few microseconds do not fail on timer noise
+ABSOLUTE_FLOOR = {
+    "_ms": 1.0,
+    "_us": 5.0,
+    "rows_per_s": 1000.0,
+}
+
+
+def _inputs(n_rows, seed=0):
+    rng = np.random.default_rng(seed)
+    low = np.array([params[0] for params in features.values()])
+    high = np.array([params[1] for params in features.values()])
+    return rng.uniform(low, high, (n_rows, len(features)))
+
+
+def bench_model(model_name, cold_repeats=5, latency_calls=2000, min_batch_time=0.5):
+    result = {}
+
+    cold = []
+    for _ in range(cold_repeats):
+        start = time.perf_counter()
+        _load_artifact(model_name)
+        cold.append(time.perf_counter() - start)
+    result["cold_load_ms"] = 1000 * float(np.median(cold))
+
+    registry.get(model_name)  # warm the registry and any compiled fast path
+    row = _inputs(1)
+    for _ in range(50):
+        predict_local(row, model_name)
+    latencies = np.empty(latency_calls)
+    for i in range(latency_calls):
+        start = time.perf_counter()
+        predict_local(row, model_name)
+        latencies[i] = time.perf_counter() - start
+    for q in (50, 95, 99):
+        result[f"single_row_p{q}_us"] = 1e6 * float(np.percentile(latencies, q))
+
+    for n_rows in BATCH_SIZES:
+        X = _inputs(n_rows)
+        calls, elapsed = 0, 0.0
+        while elapsed < min_batch_time or calls < 3:
+            start = time.perf_counter()
+            predict_local(X, model_name)
+            elapsed += time.perf_counter() - start
+            calls += 1
+        result[f"batch_{n_rows}_rows_per_s"] = n_rows * calls / elapsed
+    return result
+
+
+def bench_repeated(model_name, repeats=5):
+    """Median of each `bench_model` metric over `repeats` runs."""
+    runs = [bench_model(model_name) for _ in range(repeats)]
+    return {
+        metric: float(np.median([run[metric] for run in runs])) for metric in runs[0]
+    }
+
+
+def _floor(metric):
+    return next(
+        (floor for suffix, floor in ABSOLUTE_FLOOR.items() if metric.endswith(suffix)),
+        0.0,
+    )
+
+
+def compare(current, baseline, tolerance):
+    """Return a list of human readable regressions of `current` vs `baseline`."""
+    regressions = []
+    for model_name, metrics in baseline.get("models", {}).items():
+        if model_name not in current["models"]:
+            continue  # not benchmarked in this run
+        now = current["models"][model_name]
+        for metric, before in metrics.items():
+            if not isinstance(before, (int, float)):
+                continue
+            after = now.get(metric)
+            if not isinstance(after, (int, float)):
+                # A metric that can no longer be measured is a regression
+                reason = now.get("error", "missing")
+                regressions.append(f"{model_name}.{metric}: {before:,.2f} -> {reason}")
+                continue
+            if metric.endswith(HIGHER_IS_BETTER):
+                worse = after < before / (1 + tolerance)
+                change = before - after
+            else:
+                worse = after > before * (1 + tolerance)
+                change = after - before
+            worse = worse and change > _floor(metric)
+            if worse:
+                regressions.append(
+                    f"{model_name}.{metric}: {before:,.2f} -> {after:,.2f}"
+                )
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--models", nargs="*", default=list(models))
+    parser.add_argument("--output", help="write results as JSON to this path")
+    parser.add_argument("--baseline", help="JSON results to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    results = {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "repeats": args.repeats,
+        "models": {},
+    }
+    for model_name in args.models:
+        try:
+            results["models"][model_name] = bench_repeated(model_name, args.repeats)
+        except Exception as e:
+            results["models"][model_name] = {"error": repr(e)}
+        print(model_name, json.dumps(results["models"][model_name], indent=2))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
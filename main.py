@@ -1,8 +1,10 @@
 import streamlit as st  # type: ignore
 
 from utils.config import set_shared_config
+from src.prewarm import start_prewarm
 
 set_shared_config()
+start_prewarm()
 
 
 pages = {
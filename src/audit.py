@@ -0,0 +1,163 @@
+"""
+Prediction audit log: an in-memory buffer drained in batches to SQLite by a
+background writer thread, so serving a prediction never waits on disk I/O.
+"""
+
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+
+import pandas as pd
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS predictions (
+    ts REAL NOT NULL,
+    model_name TEXT NOT NULL,
+    artifact_hash TEXT,
+    inputs TEXT NOT NULL,
+    output REAL,
+    latency_ms REAL
+);
+CREATE INDEX IF NOT EXISTS predictions_ts ON predictions (ts);
+"""
+
+
+class AuditLog:
+    """
+    Parameters:
+        path (str): SQLite file the records are appended to.
+        capacity (int): Records buffered in memory before producers block.
+        batch_size (int): Records written per transaction at most.
+        flush_interval (float): Seconds between flushes of a partial batch.
+        put_timeout (float): Seconds a producer waits on a full buffer before
+            the record is dropped and counted in `dropped`.
+    """
+
+    def __init__(
+        self,
+        path,
+        capacity=10_000,
+        batch_size=500,
+        flush_interval=1.0,
+        put_timeout=0.05,
+    ):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.put_timeout = put_timeout
+        self._buffer: queue.Queue = queue.Queue(maxsize=capacity)
+        self._lock = threading.Lock()
+        self._writer = None
+        self.written = 0
+        self.dropped = 0
+        self.errors = 0
+
+    def record(self, model_name, artifact_hash, inputs: dict, output, latency_ms):
+        """Buffer one served prediction; blocks at most `put_timeout` when full."""
+        self._ensure_writer()
+        item = (
+            time.time(),
+            model_name,
+            artifact_hash,
+            inputs,
+            float(output),
+            latency_ms,
+        )
+        try:
+            self._buffer.put(item, timeout=self.put_timeout)
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+
+    def _ensure_writer(self):
+        if self._writer is not None and self._writer.is_alive():
+            return
+        with self._lock:
+            if self._writer is None or not self._writer.is_alive():
+                self._writer = threading.Thread(target=self._run, daemon=True)
+                self._writer.start()
+
+    def _connect(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    def _run(self):
+        conn = None
+        while True:
+            batch = [self._buffer.get()]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(self._buffer.get(timeout=timeout))
+                except queue.Empty:
+                    break
+            # A failing batch is counted and dropped; the writer carries on
+            # and reconnects for the next one.
+            try:
+                rows = [
+                    (ts, model_name, artifact_hash, json.dumps(inputs), output, latency)
+                    for ts, model_name, artifact_hash, inputs, output, latency in batch
+                ]
+                if conn is None:
+                    conn = self._connect()
+                    conn.executescript(_SCHEMA)
+                with conn:
+                    conn.executemany(
+                        "INSERT INTO predictions VALUES (?, ?, ?, ?, ?, ?)", rows
+                    )
+                self.written += len(batch)
+            except Exception:
+                self.errors += len(batch)
+                if conn is not None:
+                    conn.close()
+                    conn = None
+
+    def recent(self, limit=100, model_name=None, since=None) -> pd.DataFrame:
+        """
+        Read back logged predictions, newest first.
+
+        Parameters:
+            limit (int): Maximum rows returned.
+            model_name (str, optional): Only this model.
+            since (float, optional): Only records with a unix timestamp >= since.
+
+        Returns:
+            pd.DataFrame with one column per input feature next to the
+            logged metadata.
+        """
+        if not os.path.exists(self.path):
+            return pd.DataFrame()
+        query = "SELECT * FROM predictions WHERE 1 = 1"
+        params: list = []
+        if model_name is not None:
+            query += " AND model_name = ?"
+            params.append(model_name)
+        if since is not None:
+            query += " AND ts >= ?"
+            params.append(since)
+        query += " ORDER BY ts DESC LIMIT ?"
+        params.append(limit)
+        with sqlite3.connect(self.path, timeout=30) as conn:
+            try:
+                df = pd.read_sql_query(query, conn, params=params)
+            except pd.errors.DatabaseError:  # table not created yet
+                return pd.DataFrame()
+        df["ts"] = pd.to_datetime(df["ts"], unit="s")
+        inputs = pd.DataFrame([json.loads(value) for value in df.pop("inputs")])
+        return pd.concat([df, inputs], axis=1)
+
+    def stats(self) -> dict:
+        return {
+            "buffered": self._buffer.qsize(),
+            "written": self.written,
+            "dropped": self.dropped,
+            "errors": self.errors,
+        }
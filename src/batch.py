@@ -0,0 +1,169 @@
+import glob
+import os
+import secrets
+import shutil
+import tempfile
+import time
+from urllib.parse import quote
+
+import numpy as np
+import pandas as pd
+
+from src.helper import (
+    batch_output_dir,
+    batch_output_ttl,
+    features,
+    validate_columns,
+)
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Parquet export is optional
+    pa = None
+    pq = None
+
+CHUNK_SIZE = 50_000
+
+output_formats = ["csv", "parquet"] if pq is not None else ["csv"]
+
+
+def feature_matrix(df: pd.DataFrame, mapping: dict):
+    """
+    Extract and validate the model inputs of an uploaded frame.
+
+    Parameters:
+        df (pd.DataFrame): Uploaded data.
+        mapping (dict): Feature name -> column of `df` holding it.
+
+    Returns:
+        Same as `src.helper.validate_columns`.
+    """
+    return validate_columns({key: df[mapping[key]] for key in features})
+
+
+def predict_in_chunks(predict_fn, X: np.ndarray, invalid=None, chunk_size=CHUNK_SIZE):
+    """
+    Score `X` in fixed-size chunks, yielding after each one.
+
+    Rows flagged in `invalid` are not scored and get NaN.
+
+    Yields:
+        Tuple of (start, stop, predictions) for each chunk.
+    """
+    n_rows = len(X)
+    for start in range(0, n_rows, chunk_size):
+        stop = min(start + chunk_size, n_rows)
+        out = np.full(stop - start, np.nan)
+        rows = slice(start, stop)
+        if invalid is None:
+            out[:] = np.ravel(predict_fn(X[rows]))
+        else:
+            valid = ~invalid[rows]
+            if valid.any():
+                out[valid] = np.ravel(predict_fn(X[rows][valid]))
+        yield start, stop, out
+
+
+def output_path(file_name: str) -> str:
+    """
+    Reserve an unguessable path under `batch_output_dir` for a scored file.
+
+    Outputs older than `batch_output_ttl` are removed first.
+    """
+    now = time.time()
+    for directory in glob.glob(os.path.join(batch_output_dir, "*")):
+        try:
+            expired = now - os.stat(directory).st_mtime > batch_output_ttl
+        except FileNotFoundError:
+            continue  # removed by a concurrent session
+        if expired:
+            shutil.rmtree(directory, ignore_errors=True)
+    directory = os.path.join(batch_output_dir, secrets.token_urlsafe(16))
+    os.makedirs(directory)
+    return os.path.join(directory, os.path.basename(file_name))
+
+
+def download_url(path: str) -> str:
+    """Relative URL at which Streamlit's static file serving returns `path`."""
+    static_dir = os.path.dirname(os.path.normpath(batch_output_dir))
+    return "app/static/" + quote(os.path.relpath(path, static_dir).replace(os.sep, "/"))
+
+
+def _output_schema(df: pd.DataFrame):
+    """
+    Arrow schema shared by every chunk of a Parquet export.
+
+    Object columns have no type when empty, so theirs is taken from the first
+    non-missing value rather than left to each chunk, where a chunk without
+    values would infer `null` and no longer match the file.
+    """
+    schema = pa.Schema.from_pandas(
+        df.head(0).assign(prediction=0.0), preserve_index=False
+    )
+    for i, field in enumerate(schema):
+        if pa.types.is_null(field.type):
+            values = df[field.name].dropna()
+            if len(values):
+                schema = schema.set(i, field.with_type(pa.array(values.iloc[:1]).type))
+    return schema
+
+
+def score_to_file(
+    df,
+    predict_fn,
+    X,
+    invalid=None,
+    fmt="csv",
+    chunk_size=CHUNK_SIZE,
+    progress=None,
+    path=None,
+):
+    """
+    Score `df` chunk by chunk and append each scored chunk to a temporary file.
+
+    Only one chunk of the output is held in memory at a time.
+
+    Parameters:
+        df (pd.DataFrame): Uploaded data, written back with a `prediction` column.
+        predict_fn (Callable): Scores a 2D float array.
+        X (np.ndarray): Inputs from `feature_matrix`.
+        invalid (np.ndarray, optional): Row mask of rows to skip.
+        fmt (str): "csv" or "parquet".
+        progress (Callable[[float], None], optional): Called with the fraction done.
+        path (str, optional): File to write, e.g. from `output_path`; a new
+            temporary file by default.
+
+    Returns:
+        str: Path of the written file; the caller owns and removes it.
+    """
+    if fmt not in output_formats:
+        raise ValueError(f"Unsupported output format: {fmt}")
+    if path is None:
+        fd, path = tempfile.mkstemp(suffix=f".{fmt}")
+        os.close(fd)
+    writer = None
+    try:
+        if fmt == "parquet":
+            schema = _output_schema(df)
+            writer = pq.ParquetWriter(path, schema)
+        for start, stop, out in predict_in_chunks(predict_fn, X, invalid, chunk_size):
+            chunk = df.iloc[start:stop].assign(prediction=out)
+            if fmt == "csv":
+                chunk.to_csv(path, mode="a", header=start == 0, index=False)
+            else:
+                writer.write_table(
+                    pa.Table.from_pandas(chunk, schema=schema, preserve_index=False)
+                )
+            if progress is not None:
+                progress(stop / len(X))
+    except BaseException:
+        # The writer holds the file open; close it before removing the file
+        if writer is not None:
+            writer.close()
+        if os.path.exists(path):
+            os.remove(path)
+        raise
+    if writer is not None:
+        writer.close()
+    return path
@@ -0,0 +1,111 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class PredictionCache:
+    """
+    Bounded LRU cache with a per-entry time to live.
+
+    Parameters:
+        maxsize (int): Entries kept before evicting the least recently used.
+        ttl (float): Seconds an entry stays valid after it was stored.
+    """
+
+    def __init__(self, maxsize: int = 4096, ttl: float = 600.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        """Return (found, value)."""
+        with self._lock:
+            item = self._data.get(key)
+            if item is not None and item[1] > time.monotonic():
+                self._data.move_to_end(key)
+                self.hits += 1
+                return True, item[0]
+            if item is not None:
+                del self._data[key]
+            self.misses += 1
+            return False, None
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + self.ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def stats(self) -> dict:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hit_rate, 3),
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+        }
+
+
+class FrameCache:
+    """
+    LRU cache of parsed DataFrames bounded by their total memory footprint.
+
+    Parameters:
+        budget_bytes (int): Total `memory_usage(deep=True)` allowed before
+            evicting the least recently used frames. The newest frame is
+            always kept, even when it alone exceeds the budget.
+
+    Other values can be stored when `put` is given their size.
+    """
+
+    def __init__(self, budget_bytes: int):
+        self.budget_bytes = budget_bytes
+        self._data: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return item[0]
+
+    def put(self, key, frame, size: int | None = None):
+        if size is None:
+            size = int(frame.memory_usage(deep=True).sum())
+        with self._lock:
+            self._data[key] = (frame, size)
+            self._data.move_to_end(key)
+            while self.total_bytes > self.budget_bytes and len(self._data) > 1:
+                self._data.popitem(last=False)
+
+    @property
+    def total_bytes(self) -> int:
+        return sum(size for _, size in self._data.values())
+
+    def stats(self) -> dict:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "size": len(self._data),
+            "total_bytes": self.total_bytes,
+            "budget_bytes": self.budget_bytes,
+        }
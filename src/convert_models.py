@@ -0,0 +1,22 @@
+"""
+One-time conversion of `res/models/` artifacts to memory-mappable joblib files.
+
+Run with `python -m src.convert_models [model_name ...]`; with no names every
+entry in `src.helper.models` is converted. `load_model` picks up the converted
+copies automatically.
+"""
+
+import sys
+
+from src.helper import models
+from src.model import convert_to_mmap
+
+if __name__ == "__main__":
+    failed = False
+    for model_name in sys.argv[1:] or models:
+        try:
+            print(f"{model_name}: {convert_to_mmap(model_name)}")
+        except Exception as e:
+            print(f"{model_name}: conversion failed: {e!r}")
+            failed = True
+    sys.exit(1 if failed else 0)
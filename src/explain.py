@@ -0,0 +1,73 @@
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from src.helper import features
+
+
+@dataclass
+class ModelExplanation:
+    coefficients: pd.Series
+    effects: pd.Series
+    intercept: float
+    n_features_in: int
+
+
+def _final_estimator(model):
+    # Pipelines expose their last step through indexing
+    return model[-1] if hasattr(model, "steps") else model
+
+
+def _feature_names(model, estimator, n_coef):
+    if hasattr(model, "steps"):
+        # Names of what the pipeline's last step actually sees
+        try:
+            names = model[:-1].get_feature_names_out()
+        except Exception:
+            names = None
+        if names is not None and len(names) == n_coef:
+            return [str(name) for name in names]
+    for source in (estimator, model):
+        names = getattr(source, "feature_names_in_", None)
+        if names is not None and len(names) == n_coef:
+            return [str(name) for name in names]
+    if n_coef == len(features):
+        return list(features.keys())
+    return [f"x{i}" for i in range(n_coef)]
+
+
+def explain(model):
+    """
+    Build the explanation bundle of a linear model once, at load time.
+
+    Effect sizes scale each coefficient by the standard deviation of its
+    input, taken as uniform over the feature's range in `features`; they are
+    NaN for inputs outside `features`.
+
+    Returns:
+        ModelExplanation, or None for models without `coef_`.
+    """
+    estimator = _final_estimator(model)
+    if not hasattr(estimator, "coef_"):
+        return None
+    coef = np.ravel(np.asarray(estimator.coef_, dtype=np.float64))
+    names = _feature_names(model, estimator, len(coef))
+    spread = np.array(
+        [
+            (
+                (features[name][1] - features[name][0]) / np.sqrt(12)
+                if name in features
+                else np.nan
+            )
+            for name in names
+        ]
+    )
+    coefficients = pd.Series(coef, index=names, name="Coefficients")
+    effects = pd.Series(coef * spread, index=names, name="Effect size")
+    return ModelExplanation(
+        coefficients=coefficients.sort_values(),
+        effects=effects.reindex(effects.abs().sort_values().index),
+        intercept=float(np.ravel(getattr(estimator, "intercept_", 0.0))[0]),
+        n_features_in=model.n_features_in_,
+    )
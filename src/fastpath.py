@@ -0,0 +1,54 @@
+import warnings
+
+import numpy as np
+from sklearn.base import is_regressor
+
+
+class LinearPredictor:
+    """
+    Plain `X @ coef + intercept` stand-in for a fitted linear regressor.
+
+    Skips sklearn's per-call input validation, which dominates the cost of
+    scoring a single slider row.
+    """
+
+    __slots__ = ("coef", "intercept", "n_features_in_")
+
+    def __init__(self, coef, intercept, n_features_in):
+        self.coef = np.ascontiguousarray(coef, dtype=np.float64)
+        self.intercept = float(intercept)
+        self.n_features_in_ = n_features_in
+
+    def predict(self, X):
+        X = np.asarray(X, dtype=np.float64)
+        return np.dot(X[:, : self.n_features_in_], self.coef) + self.intercept
+
+
+def compile_linear(model, rtol=1e-9, atol=1e-9):
+    """
+    Build a `LinearPredictor` for a single-output sklearn linear regressor.
+
+    The compiled predictor is checked against `model.predict` on random
+    inputs; anything that is not a bare linear model (pipelines, GLMs with
+    a link function, classifiers, ...) returns None.
+    """
+    if not is_regressor(model) or not type(model).__module__.startswith(
+        "sklearn.linear_model"
+    ):
+        return None
+    coef = np.asarray(getattr(model, "coef_", None), dtype=np.float64)
+    intercept = np.ravel(getattr(model, "intercept_", 0.0))
+    if coef.ndim == 2 and coef.shape[0] == 1:
+        coef = coef[0]
+    if coef.ndim != 1 or intercept.size != 1:
+        return None
+
+    fast = LinearPredictor(coef, intercept[0], model.n_features_in_)
+    probe = np.random.default_rng(0).uniform(-100, 100, (8, model.n_features_in_))
+    with warnings.catch_warnings():
+        # Models fitted on a DataFrame warn about the unnamed probe columns
+        warnings.simplefilter("ignore", UserWarning)
+        expected = np.ravel(model.predict(probe))
+    if not np.allclose(fast.predict(probe), expected, rtol=rtol, atol=atol):
+        return None
+    return fast
@@ -1,3 +1,7 @@
+import os
+
+import numpy as np
+import pandas as pd
 from pydantic import BaseModel, ValidationError, conlist, conint, constr
 
 models = {
@@ -7,6 +11,70 @@ models = {
     "model04": "./res/models/model04.joblib",
 }
 
+dataset_path = "./res/data/dataset.xlsx"
+# Permutation importance / partial dependence results, keyed by model and data hash
+explain_cache_dir = "./res/cache/explain"
+
+# Models loaded in the background at server start, highest priority first;
+# leave empty to load lazily on first use
+prewarm_order: list = []
+
+# Upper bound on the estimated size of models kept loaded per server process
+model_cache_budget: int = 256 * 1024 * 1024
+
+# Slider resolution; inputs are rounded to it before prediction caching
+input_step: float = 0.01
+prediction_cache_size: int = 4096
+prediction_cache_ttl: float = 600.0
+# Threads scoring single-row predictions off the Streamlit script thread
+predict_workers: int = 4
+# What-if sweep curves and surfaces kept per (model, version, inputs, axes)
+sweep_cache_size: int = 32
+
+# SQLite file recording every served single-row prediction; None disables it
+audit_log_path: str | None = "./res/logs/predictions.sqlite"
+
+# Batch scoring results are written under Streamlit's static directory and
+# downloaded straight from disk (`server.enableStaticServing`), each in its own
+# unguessable subdirectory that is removed after `batch_output_ttl` seconds
+batch_output_dir = "./static/batch"
+batch_output_ttl: float = 3600.0
+# Streamlit does not serve static files larger than this
+batch_static_max_size: int = 200 * 1024 * 1024
+
+# Server-side files the SPC page may read (the streaming CSV and the local
+# directory inputs); typed paths resolving outside it are rejected
+server_data_root = "./res/data"
+
+# Upper bound on the memory of parsed SPC uploads kept across reruns
+upload_cache_budget: int = 1024 * 1024 * 1024
+# Uploads converted to Parquet once, then read one column at a time
+upload_parquet_dir = "./res/cache/uploads"
+upload_parquet_budget: int = 10 * 1024 * 1024 * 1024
+# Upper bound on the memory of computed SPC charts shared by the SPC pages
+spc_cache_budget: int = 256 * 1024 * 1024
+# The all-columns SPC dashboard is split across processes in shards of this
+# many columns once an upload has more of them
+dashboard_shard_columns: int = 50
+# How process pools start workers. Not "fork": the Streamlit server and the
+# model server are multi-threaded, and a forked child can inherit locks held
+# by other threads at fork time
+process_start_method: str = "forkserver"
+# Processes parsing multi-file uploads; None means one per file, up to the CPU count
+ingest_workers: int | None = None
+# Text columns with at most this share of distinct values load as categoricals
+upload_category_ratio: float = 0.5
+# float32 opt-in: a column stays float64 if rounding moves any value by more
+# than this fraction of the column's standard deviation
+upload_float32_tolerance: float = 1e-4
+
+# Set to e.g. ("localhost", 6000) to score through `python -m src.server`
+model_server_address: tuple | None = None
+# The server's shared secret is never committed: it is read from this
+# environment variable, else from this per-deploy file
+model_server_authkey_env: str = "MODEL_SERVER_AUTHKEY"
+model_server_authkey_file: str = "./res/secrets/model_server.key"
+
 features: dict = {
     "NUM1": (0.0, 100.0, 10.0),
     "no_usefull_NUM": (0.0, 100.0, 50.0),
@@ -45,6 +113,67 @@ class DataToPredict(BaseModel):
     # Feature_Z: conlist(str, min_items=1)
 
 
+def validate_columns(columns: dict):
+    """
+    Columnar counterpart of `DataToPredict` for many rows at once.
+
+    Checks every numeric feature in `features` for missing, non-numeric and
+    out-of-range values with one vectorized pass per column.
+
+    Parameters:
+        columns (dict): Feature name -> column (pd.Series, np.ndarray or list).
+
+    Returns:
+        Tuple containing:
+            - X: (rows, features) float64 array ordered like `features`,
+              NaN where a value is missing or not numeric.
+            - errors: Boolean row mask, True where any feature is invalid.
+            - report: Feature name -> counts of each kind of error.
+    """
+    n_rows = len(next(iter(columns.values()))) if columns else 0
+    X = np.empty((n_rows, len(features)), dtype=np.float64)
+    errors = np.zeros(n_rows, dtype=bool)
+    report = {}
+    for j, (key, params) in enumerate(features.items()):
+        column = pd.Series(columns[key], copy=False)
+        missing = column.isna().to_numpy()
+        if pd.api.types.is_numeric_dtype(column.dtype):
+            values = column.to_numpy(dtype=np.float64, na_value=np.nan)
+            non_numeric = np.zeros(n_rows, dtype=bool)
+        else:
+            values = pd.to_numeric(column, errors="coerce").to_numpy(
+                dtype=np.float64, na_value=np.nan
+            )
+            non_numeric = np.isnan(values) & ~missing
+        with np.errstate(invalid="ignore"):
+            out_of_range = (values < params[0]) | (values > params[1])
+        X[:, j] = values
+        errors |= missing | non_numeric | out_of_range
+        report[key] = {
+            "missing": int(missing.sum()),
+            "non_numeric": int(non_numeric.sum()),
+            "out_of_range": int(out_of_range.sum()),
+        }
+    return X, errors, report
+
+
+def resolve_data_path(path: str) -> str:
+    """
+    Resolve a server path typed into the app, confined to `server_data_root`.
+
+    Relative paths are taken from `server_data_root`. Symlinks are resolved
+    before the check, so a link inside the root cannot lead out of it.
+
+    Raises:
+        ValueError: When the resolved path is outside `server_data_root`.
+    """
+    root = os.path.realpath(server_data_root)
+    resolved = os.path.realpath(os.path.join(root, path))
+    if os.path.commonpath([root, resolved]) != root:
+        raise ValueError(f"{path} is outside the data directory {server_data_root}.")
+    return resolved
+
+
 if __name__ == "__main__":
     for feat in features:
         print(feat)
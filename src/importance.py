@@ -0,0 +1,140 @@
+"""
+Permutation importance and partial dependence, computed in a process pool
+and cached on disk per (model artifact hash, reference data hash).
+
+The bundled datasets carry no target column, so importance is measured on
+the model output itself: the mean absolute change in prediction when one
+feature is shuffled. This ranks how much the model relies on each input,
+on the scale of the prediction.
+"""
+
+import hashlib
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from src.helper import (
+    dataset_path,
+    explain_cache_dir,
+    features,
+    process_start_method,
+)
+from src.ingest import read_excel
+
+
+def load_reference(path: str = dataset_path):
+    """
+    Read the feature columns of a reference dataset.
+
+    Raises:
+        KeyError: When the dataset lacks some of the `features` columns.
+    """
+    df = read_excel(path) if path.endswith(".xlsx") else pd.read_csv(path)
+    missing = [key for key in features if key not in df.columns]
+    if missing:
+        raise KeyError(f"{path} has no column for: {', '.join(missing)}")
+    return df[list(features)].to_numpy(dtype=np.float64)
+
+
+def synthetic_reference(n_rows: int = 2000, seed: int = 0):
+    """Inputs drawn uniformly over each feature's range in `features`."""
+    rng = np.random.default_rng(seed)
+    low = np.array([params[0] for params in features.values()])
+    high = np.array([params[1] for params in features.values()])
+    return rng.uniform(low, high, (n_rows, len(features)))
+
+
+def data_hash(X: np.ndarray) -> str:
+    return hashlib.sha256(np.ascontiguousarray(X).tobytes()).hexdigest()
+
+
+def _feature_task(args):
+    model_name, X, j, n_repeats, grid, seed = args
+    from src.model import predict_local
+
+    baseline = np.ravel(predict_local(X, model_name))
+    rng = np.random.default_rng(seed + j)
+    shifts = np.empty(n_repeats)
+    X_perm = X.copy()
+    for r in range(n_repeats):
+        X_perm[:, j] = rng.permutation(X[:, j])
+        shifts[r] = np.mean(
+            np.abs(np.ravel(predict_local(X_perm, model_name)) - baseline)
+        )
+
+    # One stacked predict for the whole partial dependence grid
+    X_grid = np.repeat(X[None, :, :], len(grid), axis=0)
+    X_grid[:, :, j] = grid[:, None]
+    y_grid = np.ravel(predict_local(X_grid.reshape(-1, X.shape[1]), model_name))
+    return shifts.mean(), shifts.std(), y_grid.reshape(len(grid), -1).mean(axis=1)
+
+
+def compute_explanations(
+    model_name,
+    X,
+    model_key,
+    n_repeats=5,
+    grid_points=20,
+    max_rows=5000,
+    max_workers=None,
+):
+    """
+    Permutation importance and partial dependence of every feature.
+
+    Parameters:
+        model_name (str): Entry of `src.helper.models`.
+        X (np.ndarray): Reference inputs, columns ordered like `features`.
+        model_key (str): Hash of the model artifact, part of the cache key.
+        n_repeats (int): Shuffles per feature.
+        grid_points (int): Partial dependence grid size over each feature range.
+        max_rows (int): Larger reference sets are subsampled to this many rows.
+        max_workers (int, optional): Process pool size; defaults to one per
+            feature, capped at the CPU count.
+
+    Returns:
+        dict with:
+            - "importance": DataFrame of mean and std prediction shift per feature.
+            - "partial_dependence": Feature name -> Series of mean prediction
+              indexed by grid value.
+    """
+    if len(X) > max_rows:
+        rows = np.random.default_rng(0).choice(len(X), max_rows, replace=False)
+        X = X[np.sort(rows)]
+    path = os.path.join(
+        explain_cache_dir,
+        f"{model_name}_{model_key[:16]}_{data_hash(X)[:16]}_{n_repeats}_{grid_points}.joblib",
+    )
+    if os.path.exists(path):
+        return joblib.load(path)
+
+    grids = [
+        np.linspace(params[0], params[1], grid_points) for params in features.values()
+    ]
+    tasks = [(model_name, X, j, n_repeats, grids[j], 0) for j in range(len(features))]
+    max_workers = max_workers or min(len(tasks), os.cpu_count() or 1)
+    with ProcessPoolExecutor(
+        max_workers=max_workers,
+        mp_context=multiprocessing.get_context(process_start_method),
+    ) as pool:
+        results = list(pool.map(_feature_task, tasks))
+
+    result = {
+        "importance": pd.DataFrame(
+            [(mean, std) for mean, std, _ in results],
+            index=list(features),
+            columns=["importance", "std"],
+        ).sort_values("importance"),
+        "partial_dependence": {
+            key: pd.Series(pdp, index=grid, name=key)
+            for key, grid, (_, _, pdp) in zip(features, grids, results)
+        },
+    }
+    os.makedirs(explain_cache_dir, exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    joblib.dump(result, tmp_path)
+    os.replace(tmp_path, path)
+    return result
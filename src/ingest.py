@@ -0,0 +1,599 @@
+"""
+Shared ingestion of uploaded CSV/Excel files for the SPC pages.
+
+Parsed frames are cached by a hash of the uploaded bytes, so reruns caused
+by widget changes never touch the parser again. Cached frames are shared
+between sessions and must not be modified in place.
+
+`open_upload` goes one step further for pages that only need a column at a
+time: the upload is converted once to a local Parquet file and later reads
+load just the selected column. `open_uploads` and `open_directory` do the
+same for many files at once (e.g. one export per shift), parsing them in a
+process pool and combining them into one Parquet file.
+
+Both can downcast on load: integers to the smallest integer type that fits,
+low-cardinality text to categoricals and, as an opt-in, floats to float32.
+"""
+
+import glob
+import hashlib
+import importlib.util
+import io
+import multiprocessing
+import os
+import threading
+import weakref
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import pyarrow.parquet as pq
+
+from src.cache import FrameCache
+from src.helper import (
+    ingest_workers,
+    process_start_method,
+    upload_cache_budget,
+    upload_category_ratio,
+    upload_float32_tolerance,
+    upload_parquet_budget,
+    upload_parquet_dir,
+)
+
+ROW_GROUP_SIZE = 64 * 1024
+
+# pandas Excel engines, fastest first, with the module each one needs
+EXCEL_ENGINES = {"calamine": "python_calamine", "openpyxl": "openpyxl"}
+
+upload_cache = FrameCache(upload_cache_budget)
+
+
+def content_hash(data: bytes) -> str:
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def available_excel_engines() -> list:
+    return [
+        engine
+        for engine, module in EXCEL_ENGINES.items()
+        if importlib.util.find_spec(module) is not None
+    ]
+
+
+def _excel_engines(engine=None) -> list:
+    engines = [engine] if engine else available_excel_engines()
+    if not engines:
+        raise ImportError(
+            "No Excel engine installed; install python-calamine or openpyxl."
+        )
+    return engines
+
+
+def read_excel(source, sheet_name=0, usecols=None, engine=None) -> pd.DataFrame:
+    """
+    `pd.read_excel` with the fastest installed engine.
+
+    Falls back to the next engine when one is missing or fails on the file.
+
+    Parameters:
+        source (bytes or str): Workbook content or path.
+        sheet_name (str or int): Sheet to read.
+        usecols (list, optional): Only parse these columns.
+        engine (str, optional): Force one engine instead of auto-selection.
+    """
+    engines = _excel_engines(engine)
+    for i, name in enumerate(engines):
+        try:
+            return pd.read_excel(
+                io.BytesIO(source) if isinstance(source, bytes) else source,
+                sheet_name=sheet_name,
+                usecols=usecols,
+                engine=name,
+            )
+        except Exception:
+            if i == len(engines) - 1:
+                raise
+
+
+def excel_sheets(source, engine=None) -> list:
+    """
+    Sheet names of a workbook, without parsing any sheet.
+
+    Falls back to the next engine like `read_excel`.
+    """
+    engines = _excel_engines(engine)
+    for i, name in enumerate(engines):
+        try:
+            with pd.ExcelFile(
+                io.BytesIO(source) if isinstance(source, bytes) else source,
+                engine=name,
+            ) as workbook:
+                return workbook.sheet_names
+        except Exception:
+            if i == len(engines) - 1:
+                raise
+
+
+def downcast_column(series: pd.Series, float32: bool = False) -> pd.Series:
+    """
+    Smallest dtype that holds the column's values.
+
+    Integers are always downcast losslessly. Floats become float32 only when
+    `float32` is set and rounding shifts no value by more than
+    `upload_float32_tolerance` standard deviations. Text columns with at most
+    `upload_category_ratio` distinct values per row become categoricals.
+    """
+    if isinstance(series.dtype, pd.CategoricalDtype) or pd.api.types.is_bool_dtype(
+        series
+    ):
+        return series
+    if pd.api.types.is_integer_dtype(series):
+        unsigned = len(series) and series.min() >= 0
+        return pd.to_numeric(series, downcast="unsigned" if unsigned else "integer")
+    if pd.api.types.is_float_dtype(series):
+        if not float32 or series.dtype == np.float32:
+            return series
+        values = series.to_numpy()
+        rounded = values.astype(np.float32)
+        error = np.nanmax(np.abs(rounded - values), initial=0.0)
+        std = np.nanstd(values) if np.isfinite(values).any() else 0.0
+        if error <= upload_float32_tolerance * std or error == 0:
+            return pd.Series(rounded, index=series.index, name=series.name)
+        return series
+    if pd.api.types.is_object_dtype(series) or pd.api.types.is_string_dtype(series):
+        if series.nunique() <= upload_category_ratio * len(series):
+            return series.astype("category")
+    return series
+
+
+def downcast(df: pd.DataFrame, float32: bool = False) -> pd.DataFrame:
+    """`downcast_column` applied to every column; returns a new frame."""
+    return pd.DataFrame(
+        {column: downcast_column(df[column], float32) for column in df.columns}
+    )
+
+
+def memory_report(before: pd.DataFrame, after: pd.DataFrame) -> pd.DataFrame:
+    """
+    Per-column dtype and `memory_usage(deep=True)` of a frame before and
+    after `downcast`.
+    """
+    return pd.DataFrame(
+        {
+            "dtype_before": before.dtypes.astype(str),
+            "dtype_after": after.dtypes.astype(str),
+            "bytes_before": before.memory_usage(index=False, deep=True),
+            "bytes_after": after.memory_usage(index=False, deep=True),
+        }
+    )
+
+
+def with_total(report: pd.DataFrame) -> pd.DataFrame:
+    """Append a total row and the saved share of memory to a `memory_report`."""
+    report = report.copy()
+    report.loc["total"] = [
+        "",
+        "",
+        report["bytes_before"].sum(),
+        report["bytes_after"].sum(),
+    ]
+    report["saved"] = 1 - report["bytes_after"] / report["bytes_before"]
+    return report
+
+
+# Streamlit file_id -> content hash, so reruns don't rehash large uploads
+_upload_digests: "OrderedDict[str, str]" = OrderedDict()
+
+
+def upload_digest(uploaded_file) -> str:
+    file_id = getattr(uploaded_file, "file_id", None)
+    digest = _upload_digests.get(file_id) if file_id else None
+    if digest is None:
+        digest = content_hash(uploaded_file.getvalue())
+        if file_id:
+            _upload_digests[file_id] = digest
+            while len(_upload_digests) > 256:
+                _upload_digests.popitem(last=False)
+    return digest
+
+
+def path_digest(path: str) -> str:
+    """Cache key of a local file from its path, size and mtime, without reading it."""
+    stat = os.stat(path)
+    key = f"{os.path.abspath(path)}:{stat.st_size}:{stat.st_mtime_ns}"
+    return content_hash(key.encode())
+
+
+def _file_type(name: str) -> str:
+    file_type = name.split(".")[-1].lower()
+    if file_type not in ("csv", "xls", "xlsx"):
+        raise ValueError("Unsupported file type.")
+    return file_type
+
+
+def _parse(file_type: str, source, sheet_name=0) -> pd.DataFrame:
+    if file_type == "csv":
+        return pd.read_csv(io.BytesIO(source) if isinstance(source, bytes) else source)
+    return read_excel(source, sheet_name=sheet_name)
+
+
+def read_table(
+    name: str,
+    data: bytes,
+    digest: str | None = None,
+    sheet_name=0,
+    compact: bool = False,
+    float32: bool = False,
+) -> pd.DataFrame:
+    """
+    Parse CSV/Excel bytes, reusing the cached frame of identical content.
+
+    With `compact`, the frame is passed through `downcast` before caching.
+
+    Raises:
+        ValueError: For file types other than csv/xls/xlsx.
+    """
+    file_type = _file_type(name)
+    key = (file_type, digest or content_hash(data), sheet_name, compact, float32)
+    df = upload_cache.get(key)
+    if df is None:
+        df = _parse(file_type, data, sheet_name)
+        if compact:
+            df = downcast(df, float32)
+        upload_cache.put(key, df)
+    return df
+
+
+def read_upload(
+    uploaded_file, sheet_name=0, compact=False, float32=False
+) -> pd.DataFrame:
+    """`read_table` for a Streamlit `UploadedFile`."""
+    return read_table(
+        uploaded_file.name,
+        uploaded_file.getvalue(),
+        upload_digest(uploaded_file),
+        sheet_name,
+        compact,
+        float32,
+    )
+
+
+# Handles whose files must survive pruning while they are alive
+_open_uploads: "weakref.WeakSet[ColumnarUpload]" = weakref.WeakSet()
+
+
+def _prune_parquet_cache(keep: str):
+    """
+    Remove the least recently used Parquet files over `upload_parquet_budget`.
+
+    Only called from the serving process: pool workers never prune, and
+    files of live `ColumnarUpload` handles (which dashboard workers reopen
+    by path) are kept along with `keep`.
+    """
+    in_use = {upload.path for upload in list(_open_uploads)} | {keep}
+    files = []
+    for path in glob.glob(os.path.join(upload_parquet_dir, "*.parquet")):
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            continue  # removed by a concurrent prune
+        files.append((stat.st_mtime, stat.st_size, path))
+    files.sort()
+    total = sum(size for _, size, _ in files)
+    for _, size, path in files:
+        if total <= upload_parquet_budget:
+            break
+        if path in in_use:
+            continue
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        total -= size
+
+
+def _parquet_path(name: str, data, digest: str | None, sheet_name=0) -> str:
+    stem = digest or content_hash(data)
+    if _file_type(name) != "csv" and sheet_name != 0:
+        stem += (
+            "_" + hashlib.blake2b(str(sheet_name).encode(), digest_size=4).hexdigest()
+        )
+    return os.path.join(upload_parquet_dir, f"{stem}.parquet")
+
+
+def to_parquet(
+    name: str, data, digest: str | None = None, sheet_name=0, prune: bool = True
+) -> str:
+    """
+    Convert a CSV/Excel file to a Parquet file under `upload_parquet_dir`,
+    once per distinct content.
+
+    Parameters:
+        name (str): File name; its extension selects the parser.
+        data (bytes or str): File content, or a local path (then `digest`
+            is required, e.g. from `path_digest`).
+        digest (str, optional): Cache key; defaults to the content hash.
+        sheet_name (str or int): Sheet of an Excel workbook.
+        prune (bool): Trim the directory to `upload_parquet_budget` after
+            writing; pool workers leave it to the parent.
+
+    Returns:
+        str: Path of the Parquet file.
+    """
+    file_type = _file_type(name)
+    path = _parquet_path(name, data, digest, sheet_name)
+    if os.path.exists(path):
+        os.utime(path)  # mark as recently used for pruning
+        return path
+
+    if file_type == "csv":
+        table = pa_csv.read_csv(io.BytesIO(data) if isinstance(data, bytes) else data)
+    else:
+        df = read_excel(data, sheet_name=sheet_name)
+        df.columns = [str(column) for column in df.columns]
+        table = pa.Table.from_pandas(df, preserve_index=False)
+    _write_parquet(table, path)
+    if prune:
+        _prune_parquet_cache(keep=path)
+    return path
+
+
+def _to_parquet_task(args):
+    return to_parquet(*args, prune=False)
+
+
+def _write_parquet(table: pa.Table, path: str):
+    os.makedirs(upload_parquet_dir, exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    pq.write_table(table, tmp_path, row_group_size=ROW_GROUP_SIZE)
+    os.replace(tmp_path, path)
+
+
+def _convert_parts(files: list, max_workers=ingest_workers) -> list:
+    """`to_parquet` for each of `files`, in a process pool when several need it."""
+    paths = [_parquet_path(*file) for file in files]
+    todo = [i for i, part in enumerate(paths) if not os.path.exists(part)]
+    if len(todo) > 1:
+        workers = max_workers or min(len(todo), os.cpu_count() or 1)
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context(process_start_method),
+        ) as pool:
+            list(pool.map(_to_parquet_task, [files[i] for i in todo]))
+    elif todo:
+        to_parquet(*files[todo[0]], prune=False)
+    return paths
+
+
+def _read_part(file, part: str, reader):
+    try:
+        return reader(part)
+    except FileNotFoundError:
+        # Pruned by another session since it was converted
+        return reader(to_parquet(*file, prune=False))
+
+
+def combined_columns(files: list, max_workers=ingest_workers) -> list:
+    """
+    Columns of the files `combine_to_parquet` would combine, in order of first
+    appearance, without combining them.
+
+    The files are converted (or found converted) as by `combine_to_parquet`,
+    then only their Parquet schemas are read.
+    """
+    files = sorted(files, key=lambda file: file[0])
+    columns = {}
+    for file, part in zip(files, _convert_parts(files, max_workers)):
+        columns.update(dict.fromkeys(_read_part(file, part, pq.read_schema).names))
+    return list(columns)
+
+
+def combine_to_parquet(files: list, order_by=None, max_workers=ingest_workers) -> str:
+    """
+    Convert many CSV/Excel files concurrently and combine them into one
+    Parquet file under `upload_parquet_dir`, once per distinct set of files.
+
+    Each file goes through `to_parquet` in a process pool, so files seen
+    before (alone or in another set) are not parsed again. A `source_file`
+    column records where each row came from.
+
+    Parameters:
+        files (list): (name, data, digest) per file, as taken by `to_parquet`.
+        order_by (str, optional): Column the combined rows are sorted by,
+            e.g. a timestamp; by default files are concatenated in name order.
+        max_workers (int, optional): Process pool size; defaults to one per
+            file to convert, capped at the CPU count.
+
+    Raises:
+        KeyError: When `order_by` is not a column of any file.
+
+    Returns:
+        str: Path of the Parquet file.
+    """
+    files = sorted(files, key=lambda file: file[0])
+    stem = content_hash(
+        "|".join([digest for _, _, digest in files] + [str(order_by)]).encode()
+    )
+    path = os.path.join(upload_parquet_dir, f"combined_{stem}.parquet")
+    if os.path.exists(path):
+        os.utime(path)
+        return path
+
+    tables = []
+    for file, part in zip(files, _convert_parts(files, max_workers)):
+        table = _read_part(file, part, pq.read_table)
+        name = file[0]
+        source = pa.DictionaryArray.from_arrays(
+            pa.array(np.zeros(table.num_rows, dtype=np.int32)), pa.array([name])
+        )
+        tables.append(table.append_column("source_file", source))
+    combined = pa.concat_tables(tables, promote_options="permissive")
+    if order_by is not None:
+        if order_by not in combined.column_names:
+            raise KeyError(f"No file has a column {order_by!r}.")
+        column = combined[order_by]
+        if pa.types.is_string(column.type) or pa.types.is_large_string(column.type):
+            timestamps = pd.to_datetime(column.to_pandas(), errors="coerce")
+            combined = combined.set_column(
+                combined.column_names.index(order_by),
+                order_by,
+                pa.array(timestamps),
+            )
+        combined = combined.sort_by(order_by)
+    _write_parquet(combined.unify_dictionaries().combine_chunks(), path)
+    _prune_parquet_cache(keep=path)
+    return path
+
+
+class ColumnarUpload:
+    """
+    Handle to a converted upload that reads columns on demand.
+
+    Parameters:
+        path (str): Parquet file written by `to_parquet`.
+        compact (bool): Pass loaded columns through `downcast_column`.
+        float32 (bool): Let `downcast_column` narrow floats to float32.
+    """
+
+    def __init__(self, path: str, compact: bool = True, float32: bool = False):
+        self.path = path
+        self.compact = compact
+        self.float32 = float32
+        # Reads go through this handle, so they survive the file's pruning
+        self._file = pq.ParquetFile(path)
+        self._lock = threading.Lock()
+        _open_uploads.add(self)
+        self.columns = self._file.schema_arrow.names
+        self.num_rows = self._file.metadata.num_rows
+        schema = self._file.schema_arrow
+        self.numeric_columns = [
+            field.name
+            for field in schema
+            if pa.types.is_integer(field.type) or pa.types.is_floating(field.type)
+        ]
+
+    @property
+    def cache_key(self) -> tuple:
+        """Identifies the loaded values, for caches of derived results."""
+        return (self.path, self.compact, self.float32)
+
+    def _read(self, name: str) -> pd.DataFrame:
+        with self._lock:
+            return self._file.read(columns=[name]).to_pandas()
+
+    def head(self, n: int = 5) -> pd.DataFrame:
+        with self._lock:
+            for batch in self._file.iter_batches(batch_size=n):
+                return batch.to_pandas()
+        return pd.DataFrame(columns=self.columns)
+
+    def column(self, name: str) -> pd.Series:
+        """Load a single column, cached in memory like a parsed upload."""
+        key = (self.path, name, self.compact, self.float32)
+        frame = upload_cache.get(key)
+        if frame is None:
+            frame = self._read(name)
+            if self.compact:
+                frame = downcast(frame, self.float32)
+            upload_cache.put(key, frame)
+        return frame[name]
+
+    def memory_report(self) -> pd.DataFrame:
+        """
+        `memory_report` of the whole upload with pandas defaults vs the
+        downcast dtypes, built one column at a time to bound peak memory.
+        """
+        key = ("memory_report", self.path, self.float32)
+        report = upload_cache.get(key)
+        if report is None:
+            rows = []
+            for name in self.columns:
+                before = self._read(name)
+                rows.append(memory_report(before, downcast(before, self.float32)))
+                del before
+            report = with_total(pd.concat(rows))
+            upload_cache.put(key, report)
+        return report
+
+    def column_range(self, name: str):
+        """
+        (min, max) of a column from the row-group statistics, falling back
+        to reading the column when statistics are missing.
+        """
+        j = self.columns.index(name)
+        lows, highs = [], []
+        metadata = self._file.metadata
+        for i in range(metadata.num_row_groups):
+            stats = metadata.row_group(i).column(j).statistics
+            if stats is None or not stats.has_min_max:
+                if (
+                    stats is not None
+                    and stats.null_count == metadata.row_group(i).num_rows
+                ):
+                    continue  # all-null row group
+                column = self.column(name)
+                return column.min(), column.max()
+            lows.append(stats.min)
+            highs.append(stats.max)
+        if not lows:
+            return float("nan"), float("nan")
+        return min(lows), max(highs)
+
+
+def open_upload(
+    uploaded_file, sheet_name=0, compact=True, float32=False
+) -> ColumnarUpload:
+    """`to_parquet` + `ColumnarUpload` for a Streamlit `UploadedFile`."""
+    return ColumnarUpload(
+        to_parquet(
+            uploaded_file.name,
+            uploaded_file.getvalue(),
+            upload_digest(uploaded_file),
+            sheet_name,
+        ),
+        compact,
+        float32,
+    )
+
+
+def upload_files(uploaded_files) -> list:
+    """(name, data, digest) of Streamlit `UploadedFile`s, for `combine_to_parquet`."""
+    return [(f.name, f.getvalue(), upload_digest(f)) for f in uploaded_files]
+
+
+def directory_files(directory, pattern="*.csv") -> list:
+    """
+    (name, path, digest) of the files of a local directory, for
+    `combine_to_parquet`.
+
+    Raises:
+        FileNotFoundError: When no file in `directory` matches `pattern`.
+    """
+    paths = sorted(glob.glob(os.path.join(directory, pattern)))
+    if not paths:
+        raise FileNotFoundError(f"No file matches {pattern!r} in {directory}.")
+    return [(os.path.basename(path), path, path_digest(path)) for path in paths]
+
+
+def open_combined(files, order_by=None, compact=True, float32=False) -> ColumnarUpload:
+    """`combine_to_parquet` + `ColumnarUpload`."""
+    return ColumnarUpload(combine_to_parquet(files, order_by), compact, float32)
+
+
+def open_uploads(
+    uploaded_files, order_by=None, compact=True, float32=False
+) -> ColumnarUpload:
+    """`open_combined` for Streamlit `UploadedFile`s."""
+    return open_combined(upload_files(uploaded_files), order_by, compact, float32)
+
+
+def open_directory(
+    directory, pattern="*.csv", order_by=None, compact=True, float32=False
+) -> ColumnarUpload:
+    """`open_combined` for the files of a local directory."""
+    return open_combined(
+        directory_files(directory, pattern), order_by, compact, float32
+    )
@@ -1,40 +1,274 @@
+import hashlib
+import os
 import pickle
-import joblib
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
 from functools import lru_cache
+import joblib
+import numpy as np
 import pandas as pd
 
-from src.helper import models, features
+from src.helper import (
+    models,
+    features,
+    DataToPredict,
+    input_step,
+    model_cache_budget,
+    model_server_address,
+    prediction_cache_size,
+    prediction_cache_ttl,
+    predict_workers,
+    audit_log_path,
+)
+from src.audit import AuditLog
+from src.cache import PredictionCache
+from src.registry import ModelRegistry
+from src.fastpath import compile_linear
+from src.explain import explain
+from src.server import ModelClient
 
 
-@lru_cache
-def load_model(model_name: str = r"model01"):
-    if models[model_name].endswith(".pkl"):
-        return pickle.load(open(models[model_name], "rb"))
-    elif models[model_name].endswith(".joblib"):
-        return joblib.load(models[model_name])
+def mmap_path(model_name: str) -> str:
+    """Location of the memory-mappable copy written by `convert_to_mmap`."""
+    return os.path.splitext(models[model_name])[0] + ".mmap.joblib"
+
+
+def _artifact_path(model_name: str) -> str:
+    # Prefer the mmap-able copy unless the original was retrained after it
+    path = mmap_path(model_name)
+    try:
+        if os.stat(path).st_mtime_ns >= os.stat(models[model_name]).st_mtime_ns:
+            return path
+    except FileNotFoundError:
+        pass
+    return models[model_name]
+
+
+def _read_artifact(path: str):
+    if path.endswith(".pkl"):
+        with open(path, "rb") as f:
+            return pickle.load(f)
+    elif path.endswith(".joblib"):
+        return joblib.load(path)
     else:
         raise ValueError
 
 
-def predict(data):
-    model = load_model()
-    return model.predict(data[: model.n_features_in_])
+def _load_artifact(model_name: str):
+    path = _artifact_path(model_name)
+    if path == mmap_path(model_name):
+        # Arrays stay on the page cache and are shared by every process
+        return joblib.load(path, mmap_mode="r")
+    return _read_artifact(path)
 
 
-@lru_cache
-def model_coefficients(model):
-    return pd.Series(
-        model.coef_, index=features.keys(), name="Coefficients"
-    ).sort_values()  # type: ignore
+def _artifact_version(model_name: str):
+    path = _artifact_path(model_name)
+    stat = os.stat(path)
+    return path, stat.st_mtime_ns, stat.st_size
 
 
-if __name__ == "__main__":
-    import numpy as np
-    import time
+@lru_cache(maxsize=64)
+def _hash_file(path: str, mtime_ns: int, size: int) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
 
-    start = time.perf_counter()
-    result = predict(
-        np.array([[0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, "A", "AAA", "KK", "SS"]])
+
+def file_hash(path: str) -> str:
+    """SHA-256 of a file, recomputed only when its mtime or size changes."""
+    stat = os.stat(path)
+    return _hash_file(path, stat.st_mtime_ns, stat.st_size)
+
+
+def artifact_hash(model_name: str) -> str:
+    return file_hash(models[model_name])
+
+
+def convert_to_mmap(model_name: str) -> str:
+    """
+    Rewrite a model artifact as an uncompressed joblib file whose numpy
+    arrays can be memory-mapped, next to the original.
+
+    Returns:
+        str: Path of the converted artifact.
+    """
+    path = mmap_path(model_name)
+    tmp_path = path + ".tmp"
+    joblib.dump(_read_artifact(models[model_name]), tmp_path)
+    # Atomic so a hot reload never sees a half-written file
+    os.replace(tmp_path, path)
+    return path
+
+
+def as_model_input(model, X):
+    """Shape a 2D array of `features` columns the way `model` was fitted."""
+    if hasattr(model, "feature_names_in_"):
+        return pd.DataFrame(X, columns=list(features.keys()))
+    return np.asarray(X)[:, : model.n_features_in_]
+
+
+def _fitted_steps(model):
+    """`model` and every fitted estimator nested in its pipelines/transformers."""
+    yield model
+    for _, step in getattr(model, "steps", ()):
+        yield from _fitted_steps(step)
+    for _, step, _ in getattr(model, "transformers_", ()):
+        yield from _fitted_steps(step)
+
+
+def _default_values(model) -> dict:
+    """Default input per column: `features` defaults, else a fitted category."""
+    defaults = {}
+    for step in _fitted_steps(model):
+        # Encoders inside pipelines / column transformers know their columns
+        categories = getattr(step, "categories_", None)
+        names = getattr(step, "feature_names_in_", None)
+        if categories is not None and names is not None:
+            defaults.update((name, cats[0]) for name, cats in zip(names, categories))
+    for name, params in features.items():
+        defaults[name] = params[2] if isinstance(params[0], (int, float)) else params[0]
+    return defaults
+
+
+def _smoke_test(model):
+    """
+    Reject a reloaded artifact that cannot score a row of default inputs.
+
+    The row is built from the inputs the model was fitted on (its
+    `feature_names_in_`, else `n_features_in_` columns), not from `features`.
+    """
+    defaults = _default_values(model)
+    names = getattr(model, "feature_names_in_", None)
+    if names is not None:
+        row = [defaults.get(name, 0.0) for name in names]
+        X = pd.DataFrame([row], columns=list(names))
+    else:
+        n = model.n_features_in_
+        row = [defaults[name] for name in features] + [0.0] * n
+        X = np.array([row[:n]])
+    model.predict(X)
+
+
+def _version_hash(version):
+    return _hash_file(*version) if version is not None else None
+
+
+def _prepare(model, version) -> dict:
+    return {
+        "fast": compile_linear(model),
+        "explanation": explain(model),
+        # Hashed once per load, so the audit log never touches the file
+        "artifact_hash": _version_hash(version),
+    }
+
+
+registry = ModelRegistry(
+    _load_artifact,
+    budget_bytes=model_cache_budget,
+    versioner=_artifact_version,
+    validator=_smoke_test,
+    prepare=_prepare,
+)
+
+
+def load_model(model_name: str = r"model01"):
+    return registry.get(model_name)
+
+
+server = ModelClient() if model_server_address is not None else None
+
+
+def predict_local(data, model_name: str = r"model01"):
+    entry = registry.get_entry(model_name)
+    if entry.extras.get("fast") is not None:
+        return entry.extras["fast"].predict(data)
+    return entry.model.predict(as_model_input(entry.model, data))
+
+
+def predict(data, model_name: str = r"model01"):
+    if server is not None:
+        try:
+            return server.predict(model_name, data)
+        except ConnectionError:
+            pass  # score in-process while the server is down
+    return predict_local(data, model_name)
+
+
+prediction_cache = PredictionCache(prediction_cache_size, prediction_cache_ttl)
+
+
+def _predict_inputs(inputs: dict, model_name: str):
+    quantized = tuple(
+        (
+            round(inputs[key] / input_step)
+            if isinstance(inputs[key], float)
+            else inputs[key]
+        )
+        for key in features
+    )
+    found, result = prediction_cache.get(
+        (model_name, registry.version(model_name), quantized)
     )
-    print(f"{100 * (time.perf_counter() - start):.2f} s")
+    if found:
+        return result
+    row = {
+        key: value * input_step if isinstance(inputs[key], float) else value
+        for key, value in zip(features, quantized)
+    }
+    X = list(DataToPredict(**row).dict().values())
+    result = predict([X], model_name)
+    prediction_cache.put((model_name, registry.version(model_name), quantized), result)
+    return result
+
+
+audit_log = AuditLog(audit_log_path) if audit_log_path else None
+
+
+def predict_inputs(inputs: dict, model_name: str = r"model01"):
+    """
+    Predict one row of widget inputs, memoized on the inputs rounded to the
+    slider step and on the loaded artifact version, and record it in the
+    audit log.
+    """
+    start = time.perf_counter()
+    result = _predict_inputs(inputs, model_name)
+    if audit_log is not None:
+        audit_log.record(
+            model_name,
+            registry.get_entry(model_name).extras["artifact_hash"],
+            inputs,
+            np.ravel(result)[0],
+            1000 * (time.perf_counter() - start),
+        )
+    return result
+
+
+_executor = ThreadPoolExecutor(
+    max_workers=predict_workers, thread_name_prefix="predict"
+)
+
+
+def submit_inputs(inputs: dict, model_name: str = r"model01") -> Future:
+    """Run `predict_inputs` on a worker thread instead of the script thread."""
+    return _executor.submit(predict_inputs, inputs, model_name)
+
+
+def model_explanation(model_name: str = r"model01"):
+    return registry.get_entry(model_name).extras["explanation"]
+
+
+def model_coefficients(model_name: str = r"model01"):
+    return model_explanation(model_name).coefficients
+
+
+if __name__ == "__main__":
+    # Quick smoke timing; see `python -m benchmarks.models` for the full suite
+    load_model()
+    row = [[params[2] for params in features.values()]]
+    start = time.perf_counter()
+    result = predict(row)
+    print(f"{1000 * (time.perf_counter() - start):.3f} ms")
     print(result.round(2))
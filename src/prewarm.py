@@ -0,0 +1,54 @@
+"""
+Opt-in background prewarming of the model registry at server start.
+
+`start_prewarm` is called from `main.py`; it only does something once per
+process, and only when `prewarm_order` in `src/helper.py` lists models.
+"""
+
+import threading
+
+from src.helper import prewarm_order
+from src.model import registry
+
+_lock = threading.Lock()
+_started = False
+_state: dict[str, str] = {}
+
+
+def _warm(order):
+    for model_name in order:
+        with _lock:
+            _state[model_name] = "warming"
+        try:
+            registry.get(model_name)
+        except Exception as e:
+            with _lock:
+                _state[model_name] = f"failed: {e!r}"
+            continue
+        with _lock:
+            _state[model_name] = "ready"
+
+
+def start_prewarm(order=prewarm_order) -> bool:
+    """Start warming `order` on a daemon thread; False if already started or disabled."""
+    global _started
+    with _lock:
+        if _started or not order:
+            return False
+        _started = True
+        _state.update(dict.fromkeys(order, "pending"))
+    threading.Thread(target=_warm, args=(list(order),), daemon=True).start()
+    return True
+
+
+def model_state(model_name: str) -> str:
+    """One of "ready", "warming", "pending", "failed: ..." or "cold"."""
+    if registry.version(model_name) is not None:
+        return "ready"
+    with _lock:
+        return _state.get(model_name, "cold")
+
+
+def states() -> dict:
+    with _lock:
+        return dict(_state)
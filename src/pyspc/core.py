@@ -0,0 +1,359 @@
+# core.py
+
+import warnings
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from src.cache import FrameCache
+from src.helper import spc_cache_budget
+
+# Constants for control charts
+
+# X-bar and R chart constants for n from 2 to 9
+A2_table = {
+    2: 1.880,
+    3: 1.023,
+    4: 0.729,
+    5: 0.577,
+    6: 0.483,
+    7: 0.419,
+    8: 0.373,
+    9: 0.337,
+}
+D3_table = {2: 0, 3: 0, 4: 0, 5: 0, 6: 0, 7: 0.076, 8: 0.136, 9: 0.184}
+D4_table = {
+    2: 3.267,
+    3: 2.574,
+    4: 2.282,
+    5: 2.114,
+    6: 2.004,
+    7: 1.924,
+    8: 1.864,
+    9: 1.816,
+}
+
+# X-bar and S chart constants for n from 10 to 25
+A3_table = {
+    10: 0.975,
+    11: 0.886,
+    12: 0.810,
+    13: 0.746,
+    14: 0.692,
+    15: 0.645,
+    16: 0.604,
+    17: 0.568,
+    18: 0.535,
+    19: 0.505,
+    20: 0.478,
+    21: 0.454,
+    22: 0.432,
+    23: 0.412,
+    24: 0.393,
+    25: 0.375,
+}
+
+B3_table = {
+    10: 0.223,
+    11: 0.239,
+    12: 0.253,
+    13: 0.266,
+    14: 0.278,
+    15: 0.289,
+    16: 0.299,
+    17: 0.308,
+    18: 0.317,
+    19: 0.325,
+    20: 0.333,
+    21: 0.340,
+    22: 0.347,
+    23: 0.354,
+    24: 0.361,
+    25: 0.367,
+}
+
+B4_table = {
+    10: 1.777,
+    11: 1.757,
+    12: 1.743,
+    13: 1.732,
+    14: 1.723,
+    15: 1.716,
+    16: 1.711,
+    17: 1.707,
+    18: 1.703,
+    19: 1.700,
+    20: 1.698,
+    21: 1.697,
+    22: 1.695,
+    23: 1.694,
+    24: 1.693,
+    25: 1.693,
+}
+
+# Individuals chart constants (moving ranges of n=2)
+E2 = 2.66
+D3_MR = 0.0
+D4_MR = 3.267
+
+
+def control_limits(num_samples, center, spread_center):
+    """
+    Chart name and control limits for a subgroup size.
+
+    Parameters:
+        num_samples (int): Subgroup size; 1 for an X-MR chart, 2-9 for
+            X-bar and R, 10-25 for X-bar and S.
+        center (float): Center line of the location chart.
+        spread_center (float): Center line of the spread chart (MR-bar,
+            R-bar or S-bar).
+
+    Returns:
+        Tuple of (chart, UCL, LCL, spread UCL, spread LCL).
+    """
+    n = num_samples
+    if n == 1:
+        A, D_low, D_high, chart = E2, D3_MR, D4_MR, "X-MR"
+    elif n in A2_table:
+        A, D_low, D_high, chart = A2_table[n], D3_table[n], D4_table[n], "X-bar and R"
+    elif n in A3_table:
+        A, D_low, D_high, chart = A3_table[n], B3_table[n], B4_table[n], "X-bar and S"
+    else:
+        raise ValueError(
+            "Sample size not supported. Please choose a subgroup size between 1 and 25."
+        )
+    return (
+        chart,
+        center + A * spread_center,
+        center - A * spread_center,
+        D_high * spread_center,
+        D_low * spread_center,
+    )
+
+
+@dataclass(frozen=True, slots=True)
+class SPCResult:
+    """
+    Statistics of one control chart pair, shared by every renderer.
+
+    `location` holds the plotted points of the upper chart (individual
+    values or subgroup means) and `spread` those of the lower chart (moving
+    ranges, ranges or standard deviations), both as contiguous float64
+    arrays. `mean`, `std` and `count` describe all non-missing observations.
+    """
+
+    chart: str
+    num_samples: int
+    location: np.ndarray
+    center: float
+    ucl: float
+    lcl: float
+    spread: np.ndarray
+    spread_center: float
+    spread_ucl: float
+    spread_lcl: float
+    mean: float
+    std: float
+    count: int
+
+    @property
+    def nbytes(self) -> int:
+        return self.location.nbytes + self.spread.nbytes
+
+    def limits(self) -> dict:
+        """Same keys as `StreamingSPC.limits`."""
+        return {
+            "chart": self.chart,
+            "center": self.center,
+            "spread": self.spread_center,
+            "UCL_X": self.ucl,
+            "LCL_X": self.lcl,
+            "UCL_spread": self.spread_ucl,
+            "LCL_spread": self.spread_lcl,
+        }
+
+    def capability(self, LSL, USL):
+        """
+        Process capability indices over all observations.
+
+        Returns:
+            Tuple of (Cp, Cpk, Cpu, Cpl).
+        """
+        Cp = (USL - LSL) / (6 * self.std)
+        Cpu = (USL - self.mean) / (3 * self.std)
+        Cpl = (self.mean - LSL) / (3 * self.std)
+        Cpk = min(Cpu, Cpl)
+        return Cp, Cpk, Cpu, Cpl
+
+
+def compute_spc(data, num_samples) -> SPCResult:
+    """
+    Compute the control chart for a subgroup size in one vectorized pass.
+
+    Missing values are dropped. For subgroups, the trailing observations
+    that do not fill a whole subgroup are ignored.
+
+    Parameters:
+        data (pd.Series or np.ndarray): Observations in time order.
+        num_samples (int): Subgroup size; 1 for an X-MR chart, 2-9 for
+            X-bar and R, 10-25 for X-bar and S.
+
+    Raises:
+        ValueError: For unsupported subgroup sizes or too little data.
+    """
+    n = num_samples
+    x = np.asarray(data, dtype=np.float64).ravel()
+    x = np.ascontiguousarray(x[~np.isnan(x)])
+    if n == 1:
+        if x.size < 2:
+            raise ValueError("At least two observations are needed.")
+        location = x
+        spread = np.abs(np.diff(x))
+        center = x.mean()
+    else:
+        groups = x.size // n
+        if groups == 0:
+            raise ValueError("Not enough data for a single complete subgroup.")
+        grouped = x[: groups * n].reshape((groups, n))
+        location = grouped.mean(axis=1)
+        if n in A2_table:
+            spread = np.ptp(grouped, axis=1)
+        else:
+            spread = grouped.std(axis=1, ddof=1)
+        center = location.mean()
+    spread_center = spread.mean()
+    chart, ucl, lcl, spread_ucl, spread_lcl = control_limits(n, center, spread_center)
+    return SPCResult(
+        chart=chart,
+        num_samples=n,
+        location=location,
+        center=float(center),
+        ucl=float(ucl),
+        lcl=float(lcl),
+        spread=spread,
+        spread_center=float(spread_center),
+        spread_ucl=float(spread_ucl),
+        spread_lcl=float(spread_lcl),
+        mean=float(x.mean()),
+        std=float(x.std(ddof=1)) if x.size > 1 else np.nan,
+        count=int(x.size),
+    )
+
+
+spc_cache = FrameCache(spc_cache_budget)
+
+
+def cached_spc(data_key, column, num_samples, load) -> SPCResult:
+    """
+    `compute_spc` computed once per (data, column, subgroup size).
+
+    Parameters:
+        data_key (Hashable): Identifies the dataset, e.g. its content hash.
+        column (str): Column of the dataset.
+        num_samples (int): Subgroup size.
+        load (Callable[[], pd.Series]): Returns the column's values; only
+            called when the result is not cached yet.
+    """
+    key = (data_key, column, num_samples)
+    result = spc_cache.get(key)
+    if result is None:
+        result = compute_spc(load(), num_samples)
+        spc_cache.put(key, result, result.nbytes)
+    return result
+
+
+def summarize_spc(values, num_samples, columns=None) -> pd.DataFrame:
+    """
+    Control limits and out-of-control counts of many columns at once.
+
+    The columns are reshaped into one (columns x subgroups x n) array and
+    every statistic is a batched reduction over it. Per column, the result
+    matches `compute_spc` on that column: missing values are dropped
+    first and incomplete trailing subgroups are ignored.
+
+    Parameters:
+        values (np.ndarray): (columns, observations) array; NaN = missing.
+        num_samples (int): Subgroup size.
+        columns (list, optional): Column names, used as the index.
+
+    Returns:
+        pd.DataFrame with one row per column: observation and subgroup
+        counts, the limits as in `SPCResult.limits`, the number of points
+        beyond the location and spread limits, mean and std. Columns with
+        too little data get NaN limits.
+    """
+    n = num_samples
+    V = np.asarray(values, dtype=np.float64)
+    missing = np.isnan(V)
+    if missing.any():
+        # Move each column's missing values to its end, keeping the order
+        V = np.take_along_axis(V, np.argsort(missing, axis=1, kind="stable"), axis=1)
+    counts = V.shape[1] - missing.sum(axis=1)
+
+    if n == 1:
+        location = V
+        spread = np.abs(np.diff(V, axis=1))
+        valid_location = np.arange(V.shape[1]) < counts[:, None]
+        valid_spread = np.arange(spread.shape[1]) < counts[:, None] - 1
+    else:
+        groups = V.shape[1] // n
+        grouped = V[:, : groups * n].reshape((V.shape[0], groups, n))
+        location = grouped.mean(axis=2)
+        if n in A2_table:
+            spread = np.ptp(grouped, axis=2)
+        else:
+            spread = grouped.std(axis=2, ddof=1)
+        valid_location = valid_spread = np.arange(groups) < counts[:, None] // n
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)  # columns without data
+        center = np.nanmean(np.where(valid_location, location, np.nan), axis=1)
+        spread_center = np.nanmean(np.where(valid_spread, spread, np.nan), axis=1)
+        mean = np.nanmean(V, axis=1)
+        std = np.nanstd(V, axis=1, ddof=1)
+    chart, ucl, lcl, spread_ucl, spread_lcl = control_limits(n, center, spread_center)
+    out_location = valid_location & (
+        (location > ucl[:, None]) | (location < lcl[:, None])
+    )
+    out_spread = valid_spread & (
+        (spread > spread_ucl[:, None]) | (spread < spread_lcl[:, None])
+    )
+    return pd.DataFrame(
+        {
+            "count": counts,
+            "subgroups": valid_spread.sum(axis=1),
+            "center": center,
+            "UCL_X": ucl,
+            "LCL_X": lcl,
+            "spread": spread_center,
+            "UCL_spread": spread_ucl,
+            "LCL_spread": spread_lcl,
+            "out_of_control": out_location.sum(axis=1),
+            "spread_out_of_control": out_spread.sum(axis=1),
+            "mean": mean,
+            "std": std,
+        },
+        index=columns,
+    )
+
+
+def add_capability(summary: pd.DataFrame, LSL, USL) -> pd.DataFrame:
+    """
+    `SPCResult.capability` for every row of a `summarize_spc` table.
+
+    Parameters:
+        summary (pd.DataFrame): Output of `summarize_spc`.
+        LSL (float or pd.Series): Lower Specification Limit(s), by column.
+        USL (float or pd.Series): Upper Specification Limit(s), by column.
+
+    Returns:
+        A copy of `summary` with Cp, Cpk, Cpu and Cpl columns.
+    """
+    summary = summary.copy()
+    std, mean = summary["std"], summary["mean"]
+    summary["Cp"] = (USL - LSL) / (6 * std)
+    summary["Cpu"] = (USL - mean) / (3 * std)
+    summary["Cpl"] = (mean - LSL) / (3 * std)
+    summary["Cpk"] = np.minimum(summary["Cpu"], summary["Cpl"])
+    return summary
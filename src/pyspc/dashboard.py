@@ -0,0 +1,73 @@
+# dashboard.py
+
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from src.helper import dashboard_shard_columns, process_start_method
+from src.ingest import ColumnarUpload
+from src.pyspc.core import spc_cache, summarize_spc
+
+
+def _summarize(upload, columns, num_samples):
+    values = np.vstack(
+        [
+            upload.column(name).to_numpy(dtype=np.float64, na_value=np.nan)
+            for name in columns
+        ]
+    )
+    return summarize_spc(values, num_samples, columns)
+
+
+def _summary_task(args):
+    path, compact, float32, columns, num_samples = args
+    return _summarize(ColumnarUpload(path, compact, float32), columns, num_samples)
+
+
+def summarize_upload(upload, columns, num_samples, max_workers=None):
+    """
+    `summarize_spc` of many columns of an upload, cached like `cached_spc`.
+
+    Wide uploads are split into shards of `dashboard_shard_columns` columns
+    summarized in a process pool; each worker reads only its own columns
+    from the Parquet file, so no data is sent between processes.
+
+    Parameters:
+        upload (ColumnarUpload): Converted upload.
+        columns (list): Numeric columns to summarize.
+        num_samples (int): Subgroup size.
+        max_workers (int, optional): Process pool size; defaults to one per
+            shard, capped at the CPU count.
+
+    Returns:
+        pd.DataFrame: One row per column, see `summarize_spc`.
+    """
+    key = ("summary", upload.cache_key, tuple(columns), num_samples)
+    summary = spc_cache.get(key)
+    if summary is not None:
+        return summary
+
+    shards = [
+        columns[i : i + dashboard_shard_columns]
+        for i in range(0, len(columns), dashboard_shard_columns)
+    ]
+    workers = max_workers or min(len(shards), os.cpu_count() or 1)
+    if workers > 1:
+        tasks = [
+            (upload.path, upload.compact, upload.float32, shard, num_samples)
+            for shard in shards
+        ]
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context(process_start_method),
+        ) as pool:
+            summary = pd.concat(pool.map(_summary_task, tasks))
+    else:
+        summary = pd.concat(
+            [_summarize(upload, shard, num_samples) for shard in shards]
+        )
+    spc_cache.put(key, summary)
+    return summary
@@ -0,0 +1,191 @@
+# rules.py
+
+import numpy as np
+
+from src.pyspc.core import SPCResult, spc_cache
+
+NELSON_RULES = {
+    1: "One point beyond 3 sigma",
+    2: "Nine points in a row on the same side of the center line",
+    3: "Six points in a row steadily increasing or decreasing",
+    4: "Fourteen points in a row alternating up and down",
+    5: "Two of three points in a row beyond 2 sigma on the same side",
+    6: "Four of five points in a row beyond 1 sigma on the same side",
+    7: "Fifteen points in a row within 1 sigma",
+    8: "Eight points in a row beyond 1 sigma on both sides",
+}
+
+
+def _window(cond, k, op):
+    """
+    `op` (np.logical_and / np.logical_or) over every window of length k,
+    in log2(k) shifted passes: element i covers cond[i : i + k].
+    """
+    if cond.size < k:
+        return np.zeros(0, dtype=bool)
+    p = 1
+    while 2 * p <= k:
+        cond = op(cond[:-p], cond[p:])
+        p *= 2
+    if p < k:
+        cond = op(cond[: p - k], cond[k - p :])
+    return cond
+
+
+def _window_all(cond, k):
+    return _window(cond, k, np.logical_and)
+
+
+def _window_any(cond, k):
+    return _window(cond, k, np.logical_or)
+
+
+def _window_count(cond, k):
+    """Number of True values in every window of length k, for small k."""
+    view = cond.view(np.uint8)
+    n = cond.size - k + 1
+    if n <= 0:
+        return np.zeros(0, dtype=np.uint8)
+    counts = view[:n].copy()
+    for i in range(1, k):
+        counts += view[i : i + n]
+    return counts
+
+
+def _covered(starts, k):
+    """Points inside any window of length k that starts where `starts` is True."""
+    padded = np.zeros(starts.size + 2 * (k - 1), dtype=bool)
+    padded[k - 1 : k - 1 + starts.size] = starts
+    return _window_any(padded, k)
+
+
+def _runs(cond, k):
+    """Points inside a run of at least k consecutive True values."""
+    if cond.size < k:
+        return np.zeros(cond.size, dtype=bool)
+    return _covered(_window_all(cond, k), k)
+
+
+def _m_of_k(cond, m, k):
+    """Points meeting `cond` inside a window of k points with at least m such."""
+    if cond.size < k:
+        return np.zeros(cond.size, dtype=bool)
+    return _covered(_window_count(cond, k) >= m, k) & cond
+
+
+def nelson_rules(values, center, ucl, lcl, rules=tuple(NELSON_RULES)) -> np.ndarray:
+    """
+    Evaluate the Nelson run rules over a chart's points.
+
+    Every rule is a handful of shifted boolean reductions over the whole
+    array (log2 of the window length passes each), so the cost is linear
+    in the number of points with no Python loop over them.
+    Sigma is taken from the control limits: (UCL - center) / 3 above the
+    center line and (center - LCL) / 3 below it, which also covers spread
+    charts whose LCL is clipped at zero.
+
+    Parameters:
+        values (np.ndarray): Plotted points (X, X-bar, MR, R or S).
+        center (float): Center line.
+        ucl (float): Upper Control Limit.
+        lcl (float): Lower Control Limit.
+        rules (Iterable[int]): Rules to evaluate, from `NELSON_RULES`.
+
+    Returns:
+        np.ndarray: uint8 bitmask per point; bit r - 1 is set when the point
+        is part of a violation of rule r (every point of the run for run
+        rules, the qualifying points for the "m of k" rules 5 and 6).
+    """
+    x = np.asarray(values, dtype=np.float64)
+    mask = np.zeros(x.size, dtype=np.uint8)
+    sigma_up = (ucl - center) / 3
+    sigma_down = (center - lcl) / 3
+
+    def flag(rule, points):
+        # Shifting the booleans' bytes avoids a slow boolean-indexed write
+        mask[:] |= points.view(np.uint8) << np.uint8(rule - 1)
+
+    if 1 in rules:
+        flag(1, (x > ucl) | (x < lcl))
+    if 2 in rules:
+        flag(2, _runs(x > center, 9) | _runs(x < center, 9))
+    if 3 in rules or 4 in rules:
+        up = x[1:] > x[:-1]
+        down = x[1:] < x[:-1]
+        if 3 in rules and up.size >= 5:
+            trend = _window_all(up, 5) | _window_all(down, 5)
+            flag(3, _covered(trend, 6))
+        if 4 in rules and up.size >= 13:
+            alternating = (up[1:] & down[:-1]) | (down[1:] & up[:-1])
+            flag(4, _covered(_window_all(alternating, 12), 14))
+    if 5 in rules:
+        flag(
+            5,
+            _m_of_k(x > center + 2 * sigma_up, 2, 3)
+            | _m_of_k(x < center - 2 * sigma_down, 2, 3),
+        )
+    if 6 in rules:
+        flag(
+            6,
+            _m_of_k(x > center + sigma_up, 4, 5)
+            | _m_of_k(x < center - sigma_down, 4, 5),
+        )
+    if 7 in rules or 8 in rules:
+        above = x > center + sigma_up
+        below = x < center - sigma_down
+    if 7 in rules:
+        flag(7, _runs(~above & ~below, 15))
+    if 8 in rules and x.size >= 8:
+        both_sides = _window_any(above, 8) & _window_any(below, 8)
+        outside = _window_all(above | below, 8)
+        flag(8, _covered(outside & both_sides, 8))
+    return mask
+
+
+def describe(mask_value) -> str:
+    """Names of the rules set in one point's bitmask, one per line."""
+    return "<br>".join(
+        f"Rule {rule}: {text}"
+        for rule, text in NELSON_RULES.items()
+        if int(mask_value) & (1 << (rule - 1))
+    )
+
+
+_LABELS = np.array([describe(value) for value in range(256)], dtype=object)
+
+
+def describe_all(masks) -> np.ndarray:
+    """`describe` of many bitmasks at once, through a lookup table."""
+    return _LABELS[np.asarray(masks, dtype=np.uint8)]
+
+
+def rule_counts(mask) -> dict:
+    """Number of points flagged by each rule."""
+    return {
+        rule: int(np.count_nonzero(mask & (1 << (rule - 1)))) for rule in NELSON_RULES
+    }
+
+
+def chart_violations(result: SPCResult):
+    """
+    `nelson_rules` bitmasks of both charts of a computed chart pair.
+
+    Returns:
+        Tuple of (location mask, spread mask).
+    """
+    return (
+        nelson_rules(result.location, result.center, result.ucl, result.lcl),
+        nelson_rules(
+            result.spread, result.spread_center, result.spread_ucl, result.spread_lcl
+        ),
+    )
+
+
+def cached_violations(data_key, column, num_samples, result: SPCResult):
+    """`chart_violations` cached next to the `cached_spc` result it describes."""
+    key = ("rules", data_key, column, num_samples)
+    masks = spc_cache.get(key)
+    if masks is None:
+        masks = chart_violations(result)
+        spc_cache.put(key, masks, sum(mask.nbytes for mask in masks))
+    return masks
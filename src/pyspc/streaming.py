@@ -0,0 +1,379 @@
+# streaming.py
+
+import hashlib
+import io
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from src.pyspc.core import A2_table, A3_table, SPCResult, control_limits
+
+
+class StreamingSPC:
+    """
+    Accumulate control chart and capability statistics chunk by chunk.
+
+    Memory stays bounded by the chunk size: only running sums, running
+    moments (Chan/Welford), the incomplete trailing subgroup and the last
+    observation (for moving ranges) are kept between chunks. Missing values
+    are skipped, as in the interactive SPC page.
+
+    Parameters:
+        num_samples (int): Subgroup size; 1 for an X-MR chart, 2-9 for
+            X-bar and R, 10-25 for X-bar and S.
+    """
+
+    def __init__(self, num_samples):
+        n = num_samples
+        if n != 1 and n not in A2_table and n not in A3_table:
+            raise ValueError(
+                "Sample size not supported. Please choose a subgroup size between 1 and 25."
+            )
+        self.n = n
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.minimum = np.inf
+        self.maximum = -np.inf
+        self.subgroups = 0
+        self.center_sum = 0.0
+        self.spread_sum = 0.0
+        self._tail = np.empty(0)
+        self._last = None
+
+    def update(self, values):
+        x = np.asarray(values, dtype=np.float64).ravel()
+        x = x[~np.isnan(x)]
+        if not x.size:
+            return self
+
+        # Merge the chunk's moments into the running ones (Chan et al.)
+        k = x.size
+        chunk_mean = x.mean()
+        chunk_m2 = np.square(x - chunk_mean).sum()
+        delta = chunk_mean - self.mean
+        total = self.count + k
+        self.mean += delta * k / total
+        self.m2 += chunk_m2 + delta * delta * self.count * k / total
+        self.count = total
+        self.minimum = min(self.minimum, x.min())
+        self.maximum = max(self.maximum, x.max())
+
+        if self.n == 1:
+            # Moving ranges continue across chunk edges from the last value
+            if self._last is not None:
+                x_ext = np.concatenate(([self._last], x))
+            else:
+                x_ext = x
+            location = x
+            spread = np.abs(np.diff(x_ext))
+            self._last = x[-1]
+        else:
+            # Subgroups straddling chunk edges are completed from the tail
+            buffer = np.concatenate((self._tail, x)) if self._tail.size else x
+            whole = buffer.size // self.n * self.n
+            grouped = buffer[:whole].reshape((-1, self.n))
+            self._tail = buffer[whole:].copy()
+            location = grouped.mean(axis=1)
+            if self.n in A2_table:
+                spread = np.ptp(grouped, axis=1)
+            else:
+                spread = grouped.std(axis=1, ddof=1)
+        self._accumulate(location, spread)
+        return self
+
+    def _accumulate(self, location, spread):
+        """Add a chunk's chart points (X or subgroup means, MR/R/S) to the sums."""
+        self.center_sum += location.sum()
+        self.spread_sum += spread.sum()
+        self.subgroups += spread.size
+
+    def limits(self) -> dict:
+        """
+        Center lines and control limits matching `SPCResult.limits` of
+        `src.pyspc.core.compute_spc` on the same data.
+
+        Returns:
+            dict with the chart name, the center line of the location chart
+            (`center`) and of the spread chart (`spread`), and UCL/LCL for both.
+        """
+        if self.n == 1:
+            if not self.subgroups:
+                raise ValueError("At least two observations are needed.")
+            center = self.center_sum / self.count
+        else:
+            if not self.subgroups:
+                raise ValueError("Not enough data for a single complete subgroup.")
+            center = self.center_sum / self.subgroups
+        spread = self.spread_sum / self.subgroups
+        chart, ucl, lcl, spread_ucl, spread_lcl = control_limits(self.n, center, spread)
+        return {
+            "chart": chart,
+            "center": center,
+            "spread": spread,
+            "UCL_X": ucl,
+            "LCL_X": lcl,
+            "UCL_spread": spread_ucl,
+            "LCL_spread": spread_lcl,
+        }
+
+    @property
+    def std(self) -> float:
+        return float(np.sqrt(self.m2 / (self.count - 1))) if self.count > 1 else np.nan
+
+    def capability(self, LSL, USL):
+        """Same indices as `SPCResult.capability` over all points seen."""
+        std = self.std
+        Cp = (USL - LSL) / (6 * std)
+        Cpu = (USL - self.mean) / (3 * std)
+        Cpl = (self.mean - LSL) / (3 * std)
+        Cpk = min(Cpu, Cpl)
+        return Cp, Cpk, Cpu, Cpl
+
+
+class _Points:
+    """Append-only float64 array with amortized O(1) growth."""
+
+    def __init__(self, capacity=1024):
+        self._data = np.empty(capacity)
+        self.size = 0
+
+    def extend(self, values):
+        end = self.size + values.size
+        if end > self._data.size:
+            grown = np.empty(max(end, 2 * self._data.size))
+            grown[: self.size] = self._data[: self.size]
+            self._data = grown
+        self._data[self.size : end] = values
+        self.size = end
+
+    def view(self) -> np.ndarray:
+        # Appends only write past `size`, so earlier views never change
+        return self._data[: self.size]
+
+
+class IncrementalSPC(StreamingSPC):
+    """
+    Append-only SPC engine for a series that keeps growing.
+
+    On top of the running state of `StreamingSPC`, the chart points (X or
+    subgroup means, and MR/R/S) are kept, so after each `append` the full
+    `SPCResult` is available without touching earlier observations:
+    appending k values costs O(k), not O(N).
+
+    Parameters:
+        num_samples (int): Subgroup size; 1 for an X-MR chart, 2-9 for
+            X-bar and R, 10-25 for X-bar and S.
+    """
+
+    def __init__(self, num_samples):
+        super().__init__(num_samples)
+        self._location = _Points()
+        self._spread = _Points()
+
+    def append(self, values):
+        """Add new observations, in time order; missing values are skipped."""
+        return self.update(values)
+
+    def _accumulate(self, location, spread):
+        super()._accumulate(location, spread)
+        self._location.extend(location)
+        self._spread.extend(spread)
+
+    def result(self) -> SPCResult:
+        """
+        Same statistics as `compute_spc` over everything appended so far.
+
+        Raises:
+            ValueError: When there are not enough observations yet.
+        """
+        limits = self.limits()
+        return SPCResult(
+            chart=limits["chart"],
+            num_samples=self.n,
+            location=self._location.view(),
+            center=float(limits["center"]),
+            ucl=float(limits["UCL_X"]),
+            lcl=float(limits["LCL_X"]),
+            spread=self._spread.view(),
+            spread_center=float(limits["spread"]),
+            spread_ucl=float(limits["UCL_spread"]),
+            spread_lcl=float(limits["LCL_spread"]),
+            mean=float(self.mean),
+            std=self.std,
+            count=self.count,
+        )
+
+
+# Bytes of the header, and before the read offset, checked for rewrites
+_FINGERPRINT_BYTES = 4096
+
+
+def _records_end(block: bytes) -> int:
+    """
+    Length of the complete records at the start of `block`, which starts on
+    a record boundary; newlines inside quoted fields don't end a record.
+    """
+    data = np.frombuffer(block, dtype=np.uint8)
+    newlines = np.flatnonzero(data == ord("\n"))
+    if newlines.size and b'"' in block:
+        # Quote parity; escaped quotes ("") come in pairs and cancel out
+        inside = np.bitwise_xor.accumulate((data == ord('"')).view(np.uint8))
+        newlines = newlines[inside[newlines] == 0]
+    return int(newlines[-1]) + 1 if newlines.size else 0
+
+
+class CSVFollower:
+    """
+    Feed the rows appended to a growing CSV file into an SPC engine.
+
+    Only the bytes past the last complete record seen are read on each
+    `poll`, so a file that keeps growing (e.g. a line's measurement log)
+    costs O(new rows) per poll. Quoted fields may span lines. A last record
+    without a trailing newline is read once the file has not been modified
+    for `settle` seconds, so a finished export loses no row.
+
+    If the file is replaced (new inode), shrinks, grows after such a last
+    record was read, or its header or the bytes just before the read offset
+    change (rewritten in place), the engine starts over.
+
+    Parameters:
+        path (str): CSV file with a header row.
+        column (str): Column to analyse.
+        num_samples (int): Subgroup size.
+        engine (type): `StreamingSPC` or `IncrementalSPC`.
+        settle (float): Seconds without modification after which the file
+            counts as finished.
+    """
+
+    def __init__(self, path, column, num_samples, engine=StreamingSPC, settle=1.0):
+        self.path = path
+        self.column = column
+        self.num_samples = num_samples
+        self.engine = engine
+        self.settle = settle
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self.spc = self.engine(self.num_samples)
+        self.offset = 0
+        self.rows = 0
+        self._names = None
+        self._inode = None
+        self._digest = None
+        self._seen = None
+        self._pending = False  # an unterminated last record is waiting
+        self._closed = False  # ... and was read as final
+
+    def _fingerprint(self, f) -> bytes:
+        """Digest of the header and of the bytes just before `offset`."""
+        f.seek(0)
+        digest = hashlib.sha256(f.read(min(self.offset, _FINGERPRINT_BYTES)))
+        start = max(self.offset - _FINGERPRINT_BYTES, 0)
+        f.seek(start)
+        digest.update(f.read(self.offset - start))
+        return digest.digest()
+
+    def _rewritten(self, f, stat) -> bool:
+        return (
+            (stat.st_dev, stat.st_ino) != self._inode
+            or stat.st_size < self.offset
+            or (self._closed and stat.st_size > self.offset)
+            or self._fingerprint(f) != self._digest
+        )
+
+    def _consume(self, block: bytes, progress=None) -> int:
+        chunk = pd.read_csv(
+            io.BytesIO(block),
+            header=None,
+            names=self._names,
+            usecols=[self.column],
+        )
+        self.spc.update(
+            pd.to_numeric(chunk[self.column], errors="coerce").to_numpy(
+                dtype=np.float64, na_value=np.nan
+            )
+        )
+        self.offset += len(block)
+        self.rows += len(chunk)
+        if progress is not None:
+            progress(self.rows)
+        return len(chunk)
+
+    def poll(self, block_size=64 * 1024 * 1024, progress=None) -> int:
+        """
+        Read the rows appended since the last poll.
+
+        Parameters:
+            block_size (int): Bytes parsed at a time.
+            progress (Callable[[int], None], optional): Called with the
+                total number of rows read after each block.
+
+        Returns:
+            int: Number of new rows.
+        """
+        with self._lock:
+            stat = os.stat(self.path)
+            if (stat.st_mtime_ns, stat.st_size) == self._seen and not self._pending:
+                return 0
+            new_rows = 0
+            with open(self.path, "rb") as f:
+                if self._names is not None and self._rewritten(f, stat):
+                    self._reset()
+                f.seek(self.offset)
+                if self._names is None:
+                    header = f.readline()
+                    if not header.endswith(b"\n"):
+                        return 0  # header not fully written yet
+                    self._names = pd.read_csv(io.BytesIO(header), nrows=0).columns
+                    if self.column not in self._names:
+                        raise KeyError(f"{self.path} has no column {self.column!r}.")
+                    self.offset = f.tell()
+                remainder = b""
+                while True:
+                    block = f.read(block_size)
+                    if not block:
+                        break
+                    block = remainder + block
+                    end = _records_end(block)
+                    block, remainder = block[:end], block[end:]
+                    if block:
+                        new_rows += self._consume(block, progress)
+                finished = (
+                    f.tell() == stat.st_size
+                    and time.time() - stat.st_mtime >= self.settle
+                )
+                if remainder and finished:
+                    # The writer is done; the last record just lacks a newline
+                    new_rows += self._consume(remainder, progress)
+                    self._closed = True
+                self._pending = bool(remainder) and not self._closed
+                self._inode = (stat.st_dev, stat.st_ino)
+                self._digest = self._fingerprint(f)
+                self._seen = (stat.st_mtime_ns, stat.st_size)
+            return new_rows
+
+
+_followers: "OrderedDict[tuple, CSVFollower]" = OrderedDict()
+_followers_lock = threading.Lock()
+
+
+def follow_csv(path, column, num_samples, engine=StreamingSPC) -> CSVFollower:
+    """
+    The shared `CSVFollower` of a (file, column, subgroup size), created on
+    first use, so reruns and sessions only read rows appended since.
+    """
+    key = (os.path.abspath(path), column, num_samples, engine)
+    with _followers_lock:
+        follower = _followers.get(key)
+        if follower is None:
+            follower = _followers[key] = CSVFollower(path, column, num_samples, engine)
+            while len(_followers) > 64:
+                _followers.popitem(last=False)
+        _followers.move_to_end(key)
+    return follower
@@ -0,0 +1,259 @@
+import mmap
+import sys
+import threading
+import time
+import types
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Callable
+
+import numpy as np
+
+
+@dataclass
+class ModelEntry:
+    name: str
+    model: Any
+    size: int
+    version: Any = None
+    checked_at: float = 0.0
+    extras: dict = field(default_factory=dict)
+
+
+_OPAQUE = (
+    type,
+    types.ModuleType,
+    types.FunctionType,
+    types.BuiltinFunctionType,
+    types.MethodType,
+)
+
+
+def _is_mapped(array) -> bool:
+    # Views keep the memmap (or the mmap itself) somewhere down their bases
+    while array is not None:
+        if isinstance(array, (np.memmap, mmap.mmap)):
+            return True
+        array = getattr(array, "base", None)
+    return False
+
+
+def estimate_size(obj) -> int:
+    """
+    Approximate the in-memory footprint of a model: the `nbytes` of the
+    numpy arrays it holds plus the shallow size of every other object.
+
+    Memory-mapped arrays live in the page cache shared by all processes,
+    not in this one, and are left out of the estimate.
+    """
+    total = 0
+    seen = set()
+    stack = [obj]
+    while stack:
+        item = stack.pop()
+        if id(item) in seen:
+            continue
+        seen.add(id(item))
+        if isinstance(item, np.ndarray):
+            if not _is_mapped(item):
+                total += item.nbytes
+            continue
+        total += sys.getsizeof(item)
+        if isinstance(item, dict):
+            stack.extend(item.keys())
+            stack.extend(item.values())
+        elif isinstance(item, (list, tuple, set, frozenset)):
+            stack.extend(item)
+        elif not isinstance(item, _OPAQUE) and hasattr(item, "__dict__"):
+            stack.append(vars(item))
+    return total
+
+
+class ModelRegistry:
+    """
+    Size-aware LRU cache of loaded models.
+
+    Parameters:
+        loader (Callable[[str], Any]): Deserializes a model given its name.
+        budget_bytes (int): Total estimated size allowed before evicting the
+            least recently used models. The most recently loaded model is
+            always kept, even when it alone exceeds the budget.
+        versioner (Callable[[str], Any], optional): Returns a token that
+            changes whenever the artifact behind a name changes. When given,
+            a changed artifact is reloaded in a background thread and swapped
+            in once loaded, while callers keep getting the previous model.
+        validator (Callable[[Any], None], optional): Smoke test run on a
+            reloaded model before it replaces the current one; raising
+            rejects the new artifact, unless the current model fails the
+            same test.
+        check_interval (float): Minimum seconds between version checks of
+            the same model.
+        prepare (Callable[[Any, Any], dict], optional): Derives artifacts
+            from a freshly loaded model and its version (compiled
+            predictors, explanations, artifact hashes, ...);
+            the result is kept in `ModelEntry.extras` and lives and dies
+            with the model.
+    """
+
+    def __init__(
+        self,
+        loader: Callable[[str], Any],
+        budget_bytes: int,
+        versioner: Callable[[str], Any] | None = None,
+        validator: Callable[[Any], None] | None = None,
+        check_interval: float = 1.0,
+        prepare: Callable[[Any, Any], dict] | None = None,
+    ):
+        self._loader = loader
+        self._versioner = versioner
+        self._validator = validator
+        self._prepare = prepare
+        self.budget_bytes = budget_bytes
+        self.check_interval = check_interval
+        self._entries: "OrderedDict[str, ModelEntry]" = OrderedDict()
+        self._lock = threading.RLock()
+        self._key_locks: dict[str, threading.Lock] = {}
+        self._reloading: set[str] = set()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.reloads = 0
+        self.reload_errors: dict[str, str] = {}
+
+    def get(self, name: str):
+        return self.get_entry(name).model
+
+    def get_entry(self, name: str) -> ModelEntry:
+        with self._lock:
+            entry = self._lookup(name)
+            if entry is not None:
+                return entry
+            key_lock = self._key_locks.setdefault(name, threading.Lock())
+
+        # Only one thread deserializes a given cold model; the others wait
+        # here and pick up the freshly inserted entry.
+        with key_lock:
+            with self._lock:
+                entry = self._lookup(name)
+                if entry is not None:
+                    return entry
+            entry = self._load(name)
+            with self._lock:
+                self.misses += 1
+                self._entries[name] = entry
+                self._evict()
+            return entry
+
+    def version(self, name: str):
+        """Version of the loaded model, or None if it isn't loaded."""
+        entry = self._entries.get(name)
+        return entry.version if entry is not None else None
+
+    def _load(self, name: str) -> ModelEntry:
+        # Read the version first so a file replaced mid-load is seen as stale
+        version = self._versioner(name) if self._versioner else None
+        model = self._loader(name)
+        return ModelEntry(
+            name=name,
+            model=model,
+            size=estimate_size(model),
+            version=version,
+            checked_at=time.monotonic(),
+            extras=self._prepare(model, version) if self._prepare else {},
+        )
+
+    def _lookup(self, name: str):
+        entry = self._entries.get(name)
+        if entry is not None:
+            self._entries.move_to_end(name)
+            self.hits += 1
+            self._check_version(entry)
+        return entry
+
+    def _check_version(self, entry: ModelEntry):
+        if self._versioner is None or entry.name in self._reloading:
+            return
+        now = time.monotonic()
+        if now - entry.checked_at < self.check_interval:
+            return
+        entry.checked_at = now
+        try:
+            changed = self._versioner(entry.name) != entry.version
+        except OSError:
+            return
+        if changed:
+            self._reloading.add(entry.name)
+            threading.Thread(
+                target=self._reload, args=(entry.name,), daemon=True
+            ).start()
+
+    def _reload(self, name: str):
+        try:
+            entry = self._load(name)
+            self._validate(name, entry.model)
+        except Exception as e:
+            with self._lock:
+                self.reload_errors[name] = repr(e)
+                # Don't retry the same broken artifact on every access
+                current = self._entries.get(name)
+                if current is not None and self._versioner is not None:
+                    try:
+                        current.version = self._versioner(name)
+                    except OSError:
+                        pass
+                self._reloading.discard(name)
+            return
+        with self._lock:
+            # Callers holding the previous model keep using it; only new
+            # lookups see the swapped entry.
+            if name in self._entries:
+                self._entries[name] = entry
+                self.reloads += 1
+                self._evict()
+            self.reload_errors.pop(name, None)
+            self._reloading.discard(name)
+
+    def _validate(self, name: str, model):
+        if self._validator is None:
+            return
+        try:
+            self._validator(model)
+        except Exception:
+            # A test the serving model fails too says nothing about the new one
+            current = self._entries.get(name)
+            if current is None:
+                raise
+            try:
+                self._validator(current.model)
+            except Exception:
+                return
+            raise
+
+    def _evict(self):
+        while self.total_bytes > self.budget_bytes and len(self._entries) > 1:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    @property
+    def total_bytes(self) -> int:
+        return sum(entry.size for entry in self._entries.values())
+
+    def invalidate(self, name: str | None = None):
+        with self._lock:
+            if name is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(name, None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "reloads": self.reloads,
+                "reload_errors": dict(self.reload_errors),
+                "loaded": list(self._entries.keys()),
+                "total_bytes": self.total_bytes,
+                "budget_bytes": self.budget_bytes,
+            }
@@ -0,0 +1,229 @@
+"""
+Local model server shared by every Streamlit process on the host.
+
+Run it with `python -m src.server` and set `model_server_address` in
+`src/helper.py`, with a shared secret in the `MODEL_SERVER_AUTHKEY`
+environment variable or in `res/secrets/model_server.key`.
+`src.model.predict` then sends its requests here instead of scoring on the
+script thread. Requests for the same model that arrive within
+`batch_window` seconds of each other are stacked and scored in one call.
+"""
+
+import os
+import queue
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from multiprocessing.connection import Client, Listener
+from typing import Any
+
+import numpy as np
+
+from src.helper import (
+    models,
+    model_server_address,
+    model_server_authkey_env,
+    model_server_authkey_file,
+)
+
+
+def server_authkey() -> bytes:
+    """
+    Shared secret of the model server, from the `model_server_authkey_env`
+    environment variable, else from the `model_server_authkey_file` file.
+
+    Raises:
+        RuntimeError: When neither holds a secret; the server and its
+            clients refuse to start without one.
+    """
+    key = os.environ.get(model_server_authkey_env, "").encode()
+    if not key:
+        try:
+            with open(model_server_authkey_file, "rb") as f:
+                key = f.read().strip()
+        except FileNotFoundError:
+            pass
+    if not key:
+        raise RuntimeError(
+            f"No model server authkey: set {model_server_authkey_env} or "
+            f"write one to {model_server_authkey_file}."
+        )
+    return key
+
+
+@dataclass
+class _Pending:
+    model_name: str
+    X: np.ndarray
+    enqueued_at: float = field(default_factory=time.perf_counter)
+    done: threading.Event = field(default_factory=threading.Event)
+    result: Any = None
+    error: str | None = None
+
+
+class ModelServer:
+    """
+    Parameters:
+        address (tuple): (host, port) to listen on.
+        authkey (bytes, optional): Shared secret clients must present;
+            defaults to `server_authkey()`.
+        batch_window (float): Seconds to wait for more requests before scoring.
+        max_batch_rows (int): Stop collecting once a batch holds this many rows.
+    """
+
+    def __init__(
+        self,
+        address=model_server_address,
+        authkey=None,
+        batch_window=0.005,
+        max_batch_rows=100_000,
+    ):
+        self.address = address
+        self.authkey = authkey if authkey is not None else server_authkey()
+        self.batch_window = batch_window
+        self.max_batch_rows = max_batch_rows
+        self._queue: "queue.Queue[_Pending]" = queue.Queue()
+        self._latencies: deque = deque(maxlen=1000)
+        self._batch_sizes: deque = deque(maxlen=1000)
+        self.requests = 0
+        self.batches = 0
+
+    def serve_forever(self):
+        from src.model import load_model
+
+        # Load every model once up front; sessions only ever talk to this copy
+        for name in models:
+            try:
+                load_model(name)
+            except Exception as e:
+                print(f"Could not preload {name}: {e!r}")
+
+        threading.Thread(target=self._batch_loop, daemon=True).start()
+        with Listener(self.address, backlog=64, authkey=self.authkey) as listener:
+            print(f"Model server listening on {self.address}")
+            while True:
+                try:
+                    conn = listener.accept()
+                except Exception as e:
+                    print(f"Rejected connection: {e!r}")
+                    continue
+                threading.Thread(target=self._handle, args=(conn,), daemon=True).start()
+
+    def _handle(self, conn):
+        with conn:
+            while True:
+                try:
+                    message = conn.recv()
+                except (EOFError, OSError):
+                    return
+                if message[0] == "predict":
+                    _, model_name, X = message
+                    pending = _Pending(model_name, np.atleast_2d(X))
+                    self._queue.put(pending)
+                    pending.done.wait()
+                    if pending.error is None:
+                        conn.send(("ok", pending.result))
+                    else:
+                        conn.send(("error", pending.error))
+                elif message[0] == "stats":
+                    conn.send(("ok", self.stats()))
+                else:
+                    conn.send(("error", f"Unknown request: {message[0]!r}"))
+
+    def _batch_loop(self):
+        while True:
+            batch = [self._queue.get()]
+            rows = len(batch[0].X)
+            deadline = time.perf_counter() + self.batch_window
+            while rows < self.max_batch_rows:
+                timeout = deadline - time.perf_counter()
+                if timeout <= 0:
+                    break
+                try:
+                    pending = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                batch.append(pending)
+                rows += len(pending.X)
+
+            by_model: dict[str, list[_Pending]] = {}
+            for pending in batch:
+                by_model.setdefault(pending.model_name, []).append(pending)
+            for model_name, group in by_model.items():
+                self._score(model_name, group)
+            self.batches += 1
+            self._batch_sizes.append(len(batch))
+
+    def _score(self, model_name, group):
+        from src.model import predict_local
+
+        try:
+            y = predict_local(np.vstack([p.X for p in group]), model_name)
+            splits = np.cumsum([len(p.X) for p in group])[:-1]
+            for pending, part in zip(group, np.split(np.asarray(y), splits)):
+                pending.result = part
+        except Exception as e:
+            for pending in group:
+                pending.error = repr(e)
+        now = time.perf_counter()
+        for pending in group:
+            self._latencies.append(now - pending.enqueued_at)
+            self.requests += 1
+            pending.done.set()
+
+    def stats(self) -> dict:
+        latencies = np.array(self._latencies) * 1000
+        return {
+            "queue_depth": self._queue.qsize(),
+            "requests": self.requests,
+            "batches": self.batches,
+            "mean_batch_size": (
+                float(np.mean(self._batch_sizes)) if self._batch_sizes else 0.0
+            ),
+            "latency_ms_p50": (
+                float(np.percentile(latencies, 50)) if len(latencies) else 0.0
+            ),
+            "latency_ms_p95": (
+                float(np.percentile(latencies, 95)) if len(latencies) else 0.0
+            ),
+        }
+
+
+class ModelClient:
+    """Thread-safe client; each thread keeps its own connection to the server."""
+
+    def __init__(self, address=model_server_address, authkey=None):
+        self.address = address
+        self.authkey = authkey if authkey is not None else server_authkey()
+        self._local = threading.local()
+
+    def _request(self, message):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = Client(self.address, authkey=self.authkey)
+        try:
+            conn.send(message)
+            status, payload = conn.recv()
+        except (EOFError, OSError):
+            self._local.conn = None
+            raise ConnectionError(f"Model server at {self.address} went away")
+        if status == "error":
+            raise ValueError(payload)
+        return payload
+
+    def predict(self, model_name, X):
+        return self._request(("predict", model_name, np.asarray(X, dtype=float)))
+
+    def stats(self) -> dict:
+        return self._request(("stats",))
+
+
+if __name__ == "__main__":
+    if model_server_address is None:
+        raise SystemExit("Set model_server_address in src/helper.py first.")
+    try:
+        server = ModelServer()
+    except RuntimeError as e:
+        raise SystemExit(e)
+    server.serve_forever()
@@ -0,0 +1,87 @@
+import numpy as np
+import pandas as pd
+
+from src.cache import PredictionCache
+from src.helper import features, input_step, prediction_cache_ttl, sweep_cache_size
+from src.model import predict, registry
+
+sweep_cache = PredictionCache(sweep_cache_size, prediction_cache_ttl)
+
+
+def _axis(feature, max_points):
+    low, high = features[feature][:2]
+    n_steps = int(round((high - low) / input_step)) + 1
+    return np.linspace(low, high, min(n_steps, max_points))
+
+
+def _base(inputs, n_rows):
+    row = np.array([inputs[key] for key in features], dtype=np.float64)
+    return np.tile(row, (n_rows, 1))
+
+
+def _cached(kind, inputs, axes, model_name, compute):
+    # Keyed on the loaded artifact version, like the single-row cache
+    key = (
+        kind,
+        model_name,
+        registry.version(model_name),
+        tuple(inputs[name] for name in features),
+        axes,
+    )
+    found, result = sweep_cache.get(key)
+    if not found:
+        result = compute()
+        sweep_cache.put(key, result)
+    return result
+
+
+def sweep_1d(inputs, feature, model_name="model01", max_points=20_001):
+    """
+    Response of the model to one feature over its whole range, the other
+    features held at `inputs`, scored in a single `predict` call.
+
+    Results are cached on the model version, the inputs and the axis.
+
+    Returns:
+        pd.Series: Prediction indexed by the feature value.
+    """
+
+    def compute():
+        grid = _axis(feature, max_points)
+        X = _base(inputs, len(grid))
+        X[:, list(features).index(feature)] = grid
+        y = np.ravel(predict(X, model_name))
+        return pd.Series(y, index=pd.Index(grid, name=feature), name="Prediction")
+
+    return _cached("1d", inputs, (feature, max_points), model_name, compute)
+
+
+def sweep_2d(inputs, feature_x, feature_y, model_name="model01", max_points=250_000):
+    """
+    Response surface over two features, scored in a single `predict` call.
+
+    Each axis gets at most sqrt(`max_points`) values. Results are cached on
+    the model version, the inputs and the axes.
+
+    Returns:
+        pd.DataFrame: Predictions with `feature_y` values as index and
+        `feature_x` values as columns.
+    """
+
+    def compute():
+        per_axis = int(np.sqrt(max_points))
+        grid_x = _axis(feature_x, per_axis)
+        grid_y = _axis(feature_y, per_axis)
+        X = _base(inputs, len(grid_x) * len(grid_y))
+        # Row-major: feature_y varies slowest, matching the reshape below
+        X[:, list(features).index(feature_x)] = np.tile(grid_x, len(grid_y))
+        X[:, list(features).index(feature_y)] = np.repeat(grid_y, len(grid_x))
+        y = np.ravel(predict(X, model_name)).reshape(len(grid_y), len(grid_x))
+        return pd.DataFrame(
+            y,
+            index=pd.Index(grid_y, name=feature_y),
+            columns=pd.Index(grid_x, name=feature_x),
+        )
+
+    axes = (feature_x, feature_y, max_points)
+    return _cached("2d", inputs, axes, model_name, compute)
@@ -0,0 +1,84 @@
+import os
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.batch import download_url, output_path, score_to_file
+from src.helper import batch_output_ttl
+
+pq = pytest.importorskip("pyarrow.parquet")
+
+
+def frame(n_rows=120_000):
+    rng = np.random.default_rng(0)
+    # Kept as object dtype, and only a late chunk has a value
+    note = pd.Series(None, index=range(n_rows), dtype=object)
+    note[n_rows * 5 // 6] = "checked"
+    return pd.DataFrame(
+        {
+            "x": rng.normal(size=n_rows),
+            "note": note,
+            "line": pd.Categorical(["A", "B"] * (n_rows // 2)),
+        }
+    )
+
+
+def score(chunk):
+    return chunk[:, 0] * 2
+
+
+@pytest.mark.parametrize("fmt", ["csv", "parquet"])
+def test_score_to_file_with_sparse_text_column(fmt):
+    df = frame()
+    X = df[["x"]].to_numpy()
+    invalid = np.zeros(len(df), dtype=bool)
+    invalid[:10] = True
+    path = score_to_file(df, score, X, invalid, fmt=fmt)
+    try:
+        if fmt == "csv":
+            out = pd.read_csv(path)
+        else:
+            out = pq.read_table(path).to_pandas()
+    finally:
+        os.remove(path)
+    assert len(out) == len(df)
+    assert out.loc[100_000, "note"] == "checked"
+    assert out["note"].notna().sum() == 1
+    assert out["prediction"][:10].isna().all()
+    np.testing.assert_allclose(out["prediction"][10:], df["x"][10:] * 2)
+    assert out["line"].astype(str).tolist() == df["line"].astype(str).tolist()
+
+
+@pytest.mark.parametrize("fmt", ["csv", "parquet"])
+def test_score_to_file_removes_output_on_error(tmp_path, fmt):
+    df = frame(1000)
+    path = str(tmp_path / f"out.{fmt}")
+
+    def fail_late(chunk):
+        if chunk[0, 0] == df["x"].iloc[500]:
+            raise RuntimeError("model failed")
+        return score(chunk)
+
+    with pytest.raises(RuntimeError):
+        score_to_file(
+            df, fail_late, df[["x"]].to_numpy(), fmt=fmt, chunk_size=100, path=path
+        )
+    assert not os.path.exists(path)
+
+
+def test_output_path_is_served_and_expires(tmp_path, monkeypatch):
+    monkeypatch.setattr(
+        "src.batch.batch_output_dir", str(tmp_path / "static" / "batch")
+    )
+    old = output_path("old.csv")
+    open(old, "w").close()
+    expired = time.time() - batch_output_ttl - 1
+    os.utime(os.path.dirname(old), (expired, expired))
+
+    path = output_path("../my data_scored.csv")
+    assert os.path.dirname(os.path.dirname(path)) == str(tmp_path / "static" / "batch")
+    assert not os.path.exists(old)
+    token = os.path.basename(os.path.dirname(path))
+    assert download_url(path) == f"app/static/batch/{token}/my%20data_scored.csv"
@@ -0,0 +1,32 @@
+import os
+
+import pytest
+
+from src.helper import resolve_data_path
+
+
+@pytest.fixture
+def data_root(tmp_path, monkeypatch):
+    root = tmp_path / "data"
+    (root / "line1").mkdir(parents=True)
+    (tmp_path / "secret.csv").write_text("a\n1\n")
+    monkeypatch.setattr("src.helper.server_data_root", str(root))
+    return root
+
+
+def test_resolve_data_path_inside_root(data_root):
+    assert resolve_data_path("line1") == str(data_root / "line1")
+    assert resolve_data_path("line1/../log.csv") == str(data_root / "log.csv")
+    assert resolve_data_path(str(data_root / "log.csv")) == str(data_root / "log.csv")
+
+
+@pytest.mark.parametrize("path", ["../secret.csv", "line1/../../secret.csv", "/etc"])
+def test_resolve_data_path_rejects_paths_outside_root(data_root, path):
+    with pytest.raises(ValueError):
+        resolve_data_path(path)
+
+
+def test_resolve_data_path_follows_symlinks(data_root):
+    os.symlink(data_root.parent / "secret.csv", data_root / "link.csv")
+    with pytest.raises(ValueError):
+        resolve_data_path("link.csv")
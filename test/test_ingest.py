@@ -0,0 +1,24 @@
+import glob
+import os
+
+import pyarrow.parquet as pq
+
+from src.ingest import combine_to_parquet, combined_columns, directory_files, to_parquet
+
+
+def test_combined_columns_reads_only_the_schemas(tmp_path, monkeypatch):
+    monkeypatch.setattr("src.ingest.upload_parquet_dir", str(tmp_path / "cache"))
+    (tmp_path / "b_night.csv").write_text("ts,width,depth\n2024-01-02,1.5,3\n")
+    (tmp_path / "a_day.csv").write_text("ts,width\n2024-01-01,1.0\n2024-01-03,2.0\n")
+    files = directory_files(str(tmp_path), "*.csv")
+    for file in files:
+        to_parquet(*file, prune=False)
+
+    assert combined_columns(files) == ["ts", "width", "depth"]
+    assert not glob.glob(str(tmp_path / "cache" / "combined_*.parquet"))
+
+    path = combine_to_parquet(files, order_by="ts")
+    table = pq.read_table(path)
+    assert set(table.column_names) == {"ts", "width", "depth", "source_file"}
+    assert table["width"].to_pylist() == [1.0, 1.5, 2.0]
+    assert os.path.basename(path).startswith("combined_")
@@ -0,0 +1,95 @@
+import numpy as np
+import pytest
+
+from src.pyspc.rules import NELSON_RULES, nelson_rules, rule_counts
+
+
+def reference(x, center, ucl, lcl):
+    """Nelson rules by looping over every window, one rule at a time."""
+    sigma_up = (ucl - center) / 3
+    sigma_down = (center - lcl) / 3
+    n = len(x)
+    flags = {rule: np.zeros(n, dtype=bool) for rule in NELSON_RULES}
+
+    def windows(k):
+        return [range(i, i + k) for i in range(n - k + 1)]
+
+    for i in range(n):
+        flags[1][i] = x[i] > ucl or x[i] < lcl
+    for w in windows(9):
+        if all(x[i] > center for i in w) or all(x[i] < center for i in w):
+            flags[2][list(w)] = True
+    for w in windows(6):
+        pairs = list(zip(w, list(w)[1:]))
+        if all(x[j] > x[i] for i, j in pairs) or all(x[j] < x[i] for i, j in pairs):
+            flags[3][list(w)] = True
+    for w in windows(14):
+        diffs = [x[i + 1] - x[i] for i in list(w)[:-1]]
+        if all(a * b < 0 for a, b in zip(diffs, diffs[1:])):
+            flags[4][list(w)] = True
+    for rule, m, k, width in ((5, 2, 3, 2), (6, 4, 5, 1)):
+        for w in windows(k):
+            above = [i for i in w if x[i] > center + width * sigma_up]
+            below = [i for i in w if x[i] < center - width * sigma_down]
+            for side in (above, below):
+                if len(side) >= m:
+                    flags[rule][side] = True
+    for w in windows(15):
+        if all(center - sigma_down <= x[i] <= center + sigma_up for i in w):
+            flags[7][list(w)] = True
+    for w in windows(8):
+        above = [x[i] > center + sigma_up for i in w]
+        below = [x[i] < center - sigma_down for i in w]
+        if all(a or b for a, b in zip(above, below)) and any(above) and any(below):
+            flags[8][list(w)] = True
+
+    mask = np.zeros(n, dtype=np.uint8)
+    for rule, points in flags.items():
+        mask |= points.astype(np.uint8) << (rule - 1)
+    return mask
+
+
+def series(kind, size, seed=0):
+    rng = np.random.default_rng(seed)
+    if kind == "normal":
+        return rng.normal(0, 1, size)
+    if kind == "coarse":
+        # Few distinct values, so ties and exact 1/2/3 sigma points occur
+        return rng.integers(-4, 5, size) * 0.75
+    if kind == "drift":
+        return np.cumsum(rng.normal(0, 0.4, size))
+    if kind == "alternating":
+        x = np.where(np.arange(size) % 2, 1.5, -1.5) + rng.normal(0, 0.1, size)
+        x[size // 2 :: 17] = 0.0
+        return x
+    raise ValueError(kind)
+
+
+@pytest.mark.parametrize("kind", ["normal", "coarse", "drift", "alternating"])
+@pytest.mark.parametrize("size", [0, 1, 5, 8, 9, 13, 14, 15, 300])
+def test_nelson_rules_match_loop_reference(kind, size):
+    x = series(kind, size)
+    expected = reference(x, 0.0, 3.0, -3.0)
+    np.testing.assert_array_equal(nelson_rules(x, 0.0, 3.0, -3.0), expected)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_nelson_rules_asymmetric_limits(seed):
+    # Spread charts clip the LCL at zero, so sigma differs on each side
+    x = np.abs(series("normal", 500, seed)) * 1.2
+    expected = reference(x, 1.0, 2.8, 0.0)
+    np.testing.assert_array_equal(nelson_rules(x, 1.0, 2.8, 0.0), expected)
+
+
+def test_nelson_rules_subset():
+    x = series("drift", 400)
+    full = nelson_rules(x, 0.0, 3.0, -3.0)
+    only = nelson_rules(x, 0.0, 3.0, -3.0, rules=(2, 7))
+    np.testing.assert_array_equal(only, full & 0b01000010)
+
+
+def test_rule_counts():
+    x = np.array([0.0, 4.0, 0.0, -4.0])
+    counts = rule_counts(nelson_rules(x, 0.0, 3.0, -3.0))
+    assert counts[1] == 2
+    assert sum(counts.values()) == 2
@@ -0,0 +1,175 @@
+import os
+
+import numpy as np
+import pytest
+
+from src.pyspc.core import compute_spc
+from src.pyspc.streaming import CSVFollower, IncrementalSPC, StreamingSPC
+
+
+def observations(size=1003, seed=0):
+    rng = np.random.default_rng(seed)
+    x = rng.normal(50, 4, size)
+    x[rng.choice(size, size // 20, replace=False)] = np.nan
+    x[:3] = np.nan  # chunks made only of missing values
+    return x
+
+
+def chunks(x, size):
+    return [x[i : i + size] for i in range(0, len(x), size)]
+
+
+def assert_limits_equal(actual, expected):
+    assert actual["chart"] == expected["chart"]
+    for key in ("center", "spread", "UCL_X", "LCL_X", "UCL_spread", "LCL_spread"):
+        assert actual[key] == pytest.approx(expected[key], rel=1e-12, abs=1e-12)
+
+
+@pytest.mark.parametrize("num_samples", [1, 2, 5, 9, 10, 25])
+@pytest.mark.parametrize("chunk_size", [1, 3, 7, 25, 1000, 5000])
+def test_streaming_matches_batch(num_samples, chunk_size):
+    x = observations()
+    spc = StreamingSPC(num_samples)
+    for chunk in chunks(x, chunk_size):
+        spc.update(chunk)
+    expected = compute_spc(x, num_samples)
+
+    assert_limits_equal(spc.limits(), expected.limits())
+    assert spc.count == expected.count
+    assert spc.mean == pytest.approx(expected.mean, rel=1e-12)
+    assert spc.std == pytest.approx(expected.std, rel=1e-12)
+    np.testing.assert_allclose(
+        spc.capability(30, 70), expected.capability(30, 70), rtol=1e-12
+    )
+
+
+@pytest.mark.parametrize("num_samples", [1, 4, 12])
+@pytest.mark.parametrize("chunk_size", [1, 5, 12, 333])
+def test_incremental_matches_batch(num_samples, chunk_size):
+    x = observations(seed=1)
+    spc = IncrementalSPC(num_samples)
+    for chunk in chunks(x, chunk_size):
+        spc.append(chunk)
+    result = spc.result()
+    expected = compute_spc(x, num_samples)
+
+    np.testing.assert_allclose(result.location, expected.location, rtol=1e-12)
+    np.testing.assert_allclose(result.spread, expected.spread, rtol=1e-12)
+    assert_limits_equal(result.limits(), expected.limits())
+    assert result.count == expected.count
+
+
+def test_incremental_results_stay_valid_after_appends():
+    spc = IncrementalSPC(1)
+    spc.append(np.arange(10.0))
+    before = spc.result()
+    location = before.location.copy()
+    spc.append(np.arange(5000.0))
+    np.testing.assert_array_equal(before.location, location)
+    assert spc.result().location.size == 5010
+
+
+@pytest.mark.parametrize("num_samples", [1, 5])
+def test_too_little_data(num_samples):
+    spc = StreamingSPC(num_samples)
+    spc.update([np.nan, 1.0])
+    if num_samples == 1:
+        with pytest.raises(ValueError):
+            spc.limits()
+        spc.update([2.0])
+        assert spc.limits()["center"] == 1.5
+    else:
+        with pytest.raises(ValueError):
+            spc.limits()
+
+
+def test_unsupported_subgroup_size():
+    with pytest.raises(ValueError):
+        StreamingSPC(26)
+
+
+def write_csv(path, values, mode="w"):
+    with open(path, mode) as f:
+        if mode == "w":
+            f.write("ts,value\n")
+        f.writelines(f"{i},{value}\n" for i, value in enumerate(values))
+
+
+def test_follower_reads_appended_rows(tmp_path):
+    path = tmp_path / "log.csv"
+    x = observations(600, seed=2)
+    write_csv(path, x[:250])
+    follower = CSVFollower(str(path), "value", 5, engine=IncrementalSPC)
+    assert follower.poll(block_size=1000) == 250
+    with open(path, "a") as f:
+        f.write("250,")  # a partial line is left for the next poll
+    assert follower.poll() == 0
+    with open(path, "a") as f:
+        f.write(f"{x[250]}\n")
+    write_csv(path, x[251:], mode="a")
+    assert follower.poll(block_size=1000) == 350
+    assert follower.rows == 600
+    np.testing.assert_allclose(
+        follower.spc.result().location, compute_spc(x, 5).location, rtol=1e-12
+    )
+
+
+def test_follower_restarts_on_rewritten_file(tmp_path):
+    path = tmp_path / "log.csv"
+    rng = np.random.default_rng(3)
+    # Fixed-width values, so a rewrite can keep the exact file size
+    first, second = rng.uniform(10, 99, (2, 300)).round(4)
+    write_csv(path, [f"{value:.4f}" for value in first])
+    follower = CSVFollower(str(path), "value", 1)
+    follower.poll()
+    size = os.path.getsize(path)
+
+    write_csv(path, [f"{value:.4f}" for value in second])
+    assert os.path.getsize(path) == size
+    # Filesystems with coarse timestamps could otherwise keep the same mtime
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    follower.poll()
+    assert follower.rows == 300
+    assert follower.spc.mean == pytest.approx(second.mean(), rel=1e-12)
+
+    # Replaced by a new, longer file
+    replaced = observations(400, seed=5)
+    write_csv(tmp_path / "new.csv", replaced)
+    os.replace(tmp_path / "new.csv", path)
+    assert follower.poll() == 400
+    assert follower.spc.limits()["center"] == pytest.approx(
+        compute_spc(replaced, 1).center, rel=1e-12
+    )
+
+
+def finished(path):
+    """Backdate the file's mtime past the follower's settle time."""
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns - 10_000_000_000))
+
+
+def test_follower_reads_last_row_without_newline(tmp_path):
+    path = tmp_path / "export.csv"
+    path.write_text("ts,value\n" + "\n".join(f"{i},{i + 1}" for i in range(10)))
+    follower = CSVFollower(str(path), "value", 1)
+    assert follower.poll() == 9  # still being written, as far as it can tell
+    finished(path)
+    assert follower.poll() == 1
+    assert follower.rows == 10
+    assert follower.spc.limits()["center"] == pytest.approx(5.5)
+
+    # A finished file that grows after all is read again from the start
+    with open(path, "a") as f:
+        f.write("\n10,11\n")
+    assert follower.poll() == 11
+    assert follower.spc.limits()["center"] == pytest.approx(6.0)
+
+
+def test_follower_keeps_quoted_newlines_in_one_record(tmp_path):
+    path = tmp_path / "log.csv"
+    rows = [f'{i},"note {i}\nspans, lines ""quoted""",{i * 1.5}' for i in range(40)]
+    path.write_text("ts,note,value\n" + "\n".join(rows) + "\n")
+    follower = CSVFollower(str(path), "value", 1)
+    assert follower.poll(block_size=37) == 40
+    assert follower.spc.mean == pytest.approx(np.arange(40).mean() * 1.5)
@@ -0,0 +1,68 @@
+import numpy as np
+import pytest
+
+from src.pyspc.core import add_capability, compute_spc, summarize_spc
+
+
+def columns(seed=0, n_columns=8, size=503):
+    rng = np.random.default_rng(seed)
+    values = rng.normal(rng.uniform(0, 100, (n_columns, 1)), 3, (n_columns, size))
+    # Different amounts of missing data per column, a few shifted points
+    for j in range(n_columns):
+        values[j, rng.choice(size, j * 15, replace=False)] = np.nan
+    values[:, 200:205] += 12
+    return values
+
+
+@pytest.mark.parametrize("num_samples", [1, 2, 5, 9, 10, 25])
+def test_summary_matches_compute_spc(num_samples):
+    values = columns()
+    names = [f"c{j}" for j in range(len(values))]
+    summary = summarize_spc(values, num_samples, names)
+    assert list(summary.index) == names
+
+    for name, row in zip(names, values):
+        expected = compute_spc(row, num_samples)
+        actual = summary.loc[name]
+        assert actual["count"] == expected.count
+        assert actual["subgroups"] == expected.spread.size
+        for key, value in expected.limits().items():
+            if key != "chart":
+                assert actual[key] == pytest.approx(value, rel=1e-12)
+        assert actual["mean"] == pytest.approx(expected.mean, rel=1e-12)
+        assert actual["std"] == pytest.approx(expected.std, rel=1e-12)
+        location = expected.location
+        spread = expected.spread
+        assert actual["out_of_control"] == np.count_nonzero(
+            (location > expected.ucl) | (location < expected.lcl)
+        )
+        assert actual["spread_out_of_control"] == np.count_nonzero(
+            (spread > expected.spread_ucl) | (spread < expected.spread_lcl)
+        )
+
+
+@pytest.mark.parametrize("num_samples", [1, 5])
+def test_summary_columns_without_enough_data(num_samples):
+    values = columns(n_columns=3, size=40)
+    values[1] = np.nan
+    values[2] = np.nan
+    values[2, 0] = 1.0
+    summary = summarize_spc(values, num_samples)
+    assert summary["count"].tolist() == [40, 0, 1]
+    limits = ["UCL_X", "LCL_X", "UCL_spread", "LCL_spread"]
+    assert summary.loc[1:, limits].isna().all().all()
+    assert np.isnan(summary.loc[1, "center"])
+    assert summary.loc[1:, "out_of_control"].eq(0).all()
+    assert summary.loc[0, "center"] == pytest.approx(
+        compute_spc(values[0], num_samples).center, rel=1e-12
+    )
+
+
+def test_add_capability_matches_result():
+    values = columns(n_columns=3)
+    summary = add_capability(summarize_spc(values, 5), 40, 60)
+    for j, row in enumerate(values):
+        Cp, Cpk, Cpu, Cpl = compute_spc(row, 5).capability(40, 60)
+        assert summary.loc[j, ["Cp", "Cpk", "Cpu", "Cpl"]].tolist() == pytest.approx(
+            [Cp, Cpk, Cpu, Cpl], rel=1e-12
+        )
@@ -63,3 +63,24 @@ def set_shared_config():
             </style>
             """
         )
+
+
+def wait_for_model(model_name):
+    """
+    Show a warming notice and stop the page while `model_name` is being
+    prewarmed. Models still queued for prewarming load on demand instead;
+    the registry makes sure each is deserialized only once.
+    """
+    from src.prewarm import model_state
+
+    if model_state(model_name) != "warming":
+        return
+
+    @st.fragment(run_every=1.0)
+    def _poll():
+        if model_state(model_name) != "warming":
+            st.rerun()
+        st.info(f"⏳ {model_name} is warming up, the page will load when it is ready.")
+
+    _poll()
+    st.stop()